@@ -1,44 +1,35 @@
 import sys
 import os
-from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 import requests
-import re
 import asyncio
 from packaging import version
 import qdarktheme
 
-from mutagen.mp3 import MP3
-from mutagen.id3 import ID3, APIC, TIT2, TPE1, TALB, TDRC, TRCK, TSRC, COMM
-
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit,
-    QLabel, QFileDialog, QListWidget, QTextEdit, QTabWidget, QButtonGroup, QRadioButton,
+    QLabel, QFileDialog, QListWidget, QListView, QTextEdit, QTabWidget, QButtonGroup, QRadioButton,
     QAbstractItemView, QProgressBar, QCheckBox, QDialog,
-    QDialogButtonBox, QComboBox, QMessageBox
+    QDialogButtonBox, QComboBox, QMessageBox, QInputDialog
 )
 from PyQt6.QtCore import Qt, QThread, pyqtSignal, QUrl, QTimer, QTime, QSettings, QByteArray
 from PyQt6.QtGui import QIcon, QTextCursor, QDesktopServices, QPixmap, QPainter, QColor
 from PyQt6.QtSvg import QSvgRenderer
-from PyQt6.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply
 
 from getMetadata import get_filtered_data, parse_uri, SpotifyInvalidUrlException
+from metadataCache import metadata_cache
+from rateLimiter import rate_limiter
+from tracing import tracer, format_summary
+from coverCache import cover_cache
+from downloadEngine import Track, DownloadEngine, get_download_plan, get_job_outpath
+from retryScheduler import dead_letter_queue
+from jobQueue import JobRunner, job_queue
+from playlistSync import get_pending_sync, commit_playlist_sync
+from trackListModel import TrackListModel, TrackFilterProxyModel, format_duration
 from getSecret import scrape_and_save
 from getToken import main as get_session_token
 
-@dataclass
-class Track:
-    id: str
-    title: str
-    artists: str
-    album: str
-    track_number: int
-    duration_ms: int
-    isrc: str = ""
-    image_url: str = ""
-    release_date: str = ""
-
 class SecretScrapeWorker(QThread):
     finished = pyqtSignal(bool, str)
     progress = pyqtSignal(str)
@@ -62,23 +53,58 @@ class FetchTracksThread(QThread):
     finished = pyqtSignal(dict)
     error = pyqtSignal(str)
     
-    def __init__(self, url):
+    def __init__(self, url, sync=False, use_async=False):
         super().__init__()
         self.url = url
+        self.sync = sync
+        self.use_async = use_async
         
     def run(self):
+        tracer.start_run("fetch")
+        try:
+            result = self.fetch()
+        finally:
+            summary = tracer.end_run()
+        
+        if isinstance(result, str):
+            self.error.emit(result)
+            return
+        
+        fetch_stats = f"{metadata_cache.format_stats()}\n{rate_limiter.format_stats()}"
+        if summary:
+            fetch_stats += f"\n{format_summary(summary)}"
+        self.finished.emit({**result, "fetch_stats": fetch_stats})
+
+    def fetch(self):
         try:
-            metadata = get_filtered_data(self.url)
+            metadata_cache.reset_stats()
+            rate_limiter.reset_stats()
+            if self.use_async:
+                from getMetadataAsync import get_filtered_data as get_filtered_data_async
+                metadata = get_filtered_data_async(self.url, sync=self.sync)
+            else:
+                metadata = get_filtered_data(self.url, sync=self.sync)
             if "error" in metadata:
-                self.error.emit(metadata["error"])
-                return
+                return metadata["error"]
             
-            url_info = parse_uri(self.url)
-            self.finished.emit({"metadata": metadata, "url_info": url_info})
+            return {"metadata": metadata, "url_info": parse_uri(self.url)}
         except SpotifyInvalidUrlException as e:
-            self.error.emit(str(e))
+            return str(e)
         except Exception as e:
-            self.error.emit(f'Failed to fetch metadata: {str(e)}')
+            return f'Failed to fetch metadata: {str(e)}'
+            
+class CoverFetchThread(QThread):
+    loaded = pyqtSignal(str, bytes)
+    
+    def __init__(self, url):
+        super().__init__()
+        self.url = url
+        
+    def run(self):
+        try:
+            self.loaded.emit(self.url, cover_cache.get(self.url))
+        except Exception as e:
+            print(f"Error loading cover: {e}")
             
 class TokenFetchThread(QThread):
     token_fetched = pyqtSignal(str)
@@ -105,285 +131,72 @@ class DownloadWorker(QThread):
     finished = pyqtSignal(bool, str, list, list, list)
     progress = pyqtSignal(str, int)
     
-    def __init__(self, parent, tracks, outpath, token, is_single_track=False, is_album=False, is_playlist=False, 
-                 album_or_playlist_name='', filename_format='title_artist', use_track_numbers=True,
-                 use_artist_subfolders=False, use_album_subfolders=False):
+    def __init__(self, parent, tracks, outpath, token, *args, **kwargs):
         super().__init__()
         self.parent = parent
-        self.tracks = tracks
-        self.outpath = outpath
-        self.token = token
-        self.is_single_track = is_single_track
-        self.is_album = is_album
-        self.is_playlist = is_playlist
-        self.album_or_playlist_name = album_or_playlist_name
-        self.filename_format = filename_format
-        self.use_track_numbers = use_track_numbers
-        self.use_artist_subfolders = use_artist_subfolders
-        self.use_album_subfolders = use_album_subfolders
-        self.is_paused = False
-        self.is_stopped = False
-        self.failed_tracks = []
-        self.successful_tracks = []
-        self.skipped_tracks = []
-
-    def get_formatted_filename(self, track):
-        if self.filename_format == "artist_title":
-            filename = f"{track.artists} - {track.title}.mp3"
-        elif self.filename_format == "title_only":
-            filename = f"{track.title}.mp3"
-        else:
-            filename = f"{track.title} - {track.artists}.mp3"
-        filename = re.sub(r'[<>:"/\\|?*]', lambda m: "'" if m.group() == '"' else '_', filename)
-        return filename
+        self.engine = DownloadEngine(tracks, outpath, token, *args,
+                                     progress=self.progress.emit, finished=self.finished.emit, **kwargs)
 
-    def is_valid_existing_file(self, filepath):
-        if not os.path.exists(filepath):
-            return False
-        
-        try:
-            file_size = os.path.getsize(filepath)
-            if file_size < 100000:  
-                return False
-            
-            audio = MP3(filepath)
-            if audio.info.length > 0:  
-                return True
-            else:
-                return False
-        except Exception:
-            return False
+    @property
+    def is_paused(self):
+        return self.engine.is_paused
 
-    def download_track(self, track):
-        try:
-            filename = self.get_formatted_filename(track)
-            
-            if self.is_playlist:
-                outpath = self.outpath
-                
-                if self.use_artist_subfolders:
-                    artist_name = track.artists.split(', ')[0] if ', ' in track.artists else track.artists
-                    artist_folder = re.sub(r'[<>:"/\\|?*]', lambda m: "'" if m.group() == '"' else '_', artist_name)
-                    outpath = os.path.join(outpath, artist_folder)
-                
-                if self.use_album_subfolders:
-                    album_folder = re.sub(r'[<>:"/\\|?*]', lambda m: "'" if m.group() == '"' else '_', track.album)
-                    outpath = os.path.join(outpath, album_folder)
-                
-                os.makedirs(outpath, exist_ok=True)
-            else:
-                outpath = self.outpath
+    @property
+    def token(self):
+        return self.engine.token
 
-            if (self.is_album or self.is_playlist) and self.use_track_numbers:
-                filename = f"{track.track_number:02d} - {filename}"
-        
-            filepath = os.path.join(outpath, filename)
+    @token.setter
+    def token(self, value):
+        self.engine.token = value
 
-            if self.is_valid_existing_file(filepath):
-                return True, "File already exists - skipped"
-            
-            if os.path.exists(filepath):
-                try:
-                    os.remove(filepath)
-                except Exception as e:
-                    return False, f"Failed to remove corrupted file: {str(e)}"
-
-            headers = {
-                'Host': 'api.spotidownloader.com',
-                'Referer': 'https://spotidownloader.com/',
-                'Origin': 'https://spotidownloader.com',
-                'Authorization': f'Bearer {self.token}',
-                'Content-Type': 'application/json'
-            }
-            
-            payload = {"id": track.id}
-            
-            response = requests.post(
-                "https://api.spotidownloader.com/download",
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-            
-            if response.status_code != 200:
-                return False, f"API request failed with status code: {response.status_code}, Response: {response.text}"
-            
-            data = response.json()
-            if not data.get('success'):
-                return False, f"API request failed: {data.get('error', 'Unknown error')}"
+    def run(self):
+        self.engine.run()
 
-            host = data['link'].split('//', 1)[1].split('/', 1)[0]
-            
-            download_headers = {
-                'Host': host,
-                'Referer': 'https://spotidownloader.com/',
-                'Origin': 'https://spotidownloader.com'
-            }
-            
-            audio_response = requests.get(data['link'], headers=download_headers, timeout=300)
-            if audio_response.status_code != 200:
-                return False, f"Failed to download audio file. Status code: {audio_response.status_code}"
-            
-            temp_filepath = filepath + ".tmp"
-            try:
-                with open(temp_filepath, "wb") as file:
-                    file.write(audio_response.content)
-                
-                if self.is_valid_existing_file(temp_filepath):
-                    os.rename(temp_filepath, filepath)
-                    self.embed_metadata(filepath, track)
-                else:
-                    if os.path.exists(temp_filepath):
-                        os.remove(temp_filepath)
-                    return False, "Downloaded file appears to be corrupted"
-            except Exception as e:
-                if os.path.exists(temp_filepath):
-                    try:
-                        os.remove(temp_filepath)
-                    except:
-                        pass
-                raise e
-            
-            return True, ""
-        except requests.Timeout:
-            return False, "Request timed out - connection took too long"
-        except Exception as e:
-            return False, f"Exception occurred: {str(e)}"
+    def pause(self):
+        self.engine.pause()
 
-    def embed_metadata(self, filepath, track):
-        audio = MP3(filepath, ID3=ID3)
-        
-        try:
-            audio.add_tags()
-        except:
-            pass
+    def resume(self):
+        self.engine.resume()
 
-        audio.tags.add(TIT2(encoding=3, text=track.title))
-        audio.tags.add(TPE1(encoding=3, text=track.artists.split(", ")))
-        audio.tags.add(TALB(encoding=3, text=track.album))
-        audio.tags.add(COMM(encoding=3, lang='eng', desc='Source', text='github.com/afkarxyz/SpotiDownloader'))
+    def stop(self): 
+        self.engine.stop()
 
-        try:
-            if track.release_date:
-                try:
-                    release_date = datetime.strptime(track.release_date, "%Y-%m-%d")
-                    audio.tags.add(TDRC(encoding=3, text=track.release_date))
-                except ValueError:
-                    if track.release_date.isdigit():
-                        audio.tags.add(TDRC(encoding=3, text=track.release_date))
-        except Exception as e:
-            print(f"Error adding release date: {e}")
+class JobQueueWorker(QThread):
+    finished = pyqtSignal(bool, str, list, list, list)
+    progress = pyqtSignal(str, int)
+    job_updated = pyqtSignal(object)
+    
+    def __init__(self, queue, token, outpath, *args, **kwargs):
+        super().__init__()
+        self.runner = JobRunner(queue, token, outpath, *args, progress=self.progress.emit, finished=self.finished.emit,
+                                job_updated=self.job_updated.emit, **kwargs)
 
-        audio.tags.add(TRCK(encoding=3, text=str(track.track_number)))
-        audio.tags.add(TSRC(encoding=3, text=track.isrc))
+    @property
+    def is_paused(self):
+        return self.runner.is_paused
 
-        if track.image_url:
-            try:
-                image_headers = {
-                    'Referer': 'https://spotidownloader.com/',
-                    'Origin': 'https://spotidownloader.com'
-                }
-                image_data = requests.get(track.image_url, headers=image_headers).content
-                audio.tags.add(APIC(
-                    encoding=3,
-                    mime='image/jpeg',
-                    type=3,
-                    desc='',
-                    data=image_data
-                ))
-            except Exception as e:
-                print(f"Error adding cover art: {e}")
-
-        audio.save()
-
-    def scan_existing_files(self):
-        existing_count = 0
-        for track in self.tracks:
-            filename = self.get_formatted_filename(track)
-            
-            if self.is_playlist:
-                outpath = self.outpath
-                
-                if self.use_artist_subfolders:
-                    artist_name = track.artists.split(', ')[0] if ', ' in track.artists else track.artists
-                    artist_folder = re.sub(r'[<>:"/\\|?*]', lambda m: "'" if m.group() == '"' else '_', artist_name)
-                    outpath = os.path.join(outpath, artist_folder)
-                
-                if self.use_album_subfolders:
-                    album_folder = re.sub(r'[<>:"/\\|?*]', lambda m: "'" if m.group() == '"' else '_', track.album)
-                    outpath = os.path.join(outpath, album_folder)
-            else:
-                outpath = self.outpath
+    @property
+    def token(self):
+        return self.runner.token
 
-            if (self.is_album or self.is_playlist) and self.use_track_numbers:
-                filename = f"{track.track_number:02d} - {filename}"
-        
-            filepath = os.path.join(outpath, filename)
-            
-            if self.is_valid_existing_file(filepath):
-                existing_count += 1
-        
-        return existing_count
+    @token.setter
+    def token(self, value):
+        self.runner.set_token(value)
 
     def run(self):
-        try:
-            total_tracks = len(self.tracks)
-            
-            existing_count = self.scan_existing_files()
-            if existing_count > 0:
-                self.progress.emit(f"Found {existing_count} already downloaded tracks (will be skipped)", 0)
-            
-            for i, track in enumerate(self.tracks):
-                while self.is_paused:
-                    if self.is_stopped:
-                        return
-                    self.msleep(100)
-                if self.is_stopped:
-                    return
-
-                self.progress.emit(f"Processing ({i+1}/{total_tracks}): {track.title} - {track.artists}", 
-                                int((i) / total_tracks * 100))
-                
-                success, error_message = self.download_track(track)
-                
-                if success:
-                    if error_message == "File already exists - skipped":
-                        self.skipped_tracks.append(track)
-                        self.progress.emit(f"Skipped (already exists): {track.title} - {track.artists}", 
-                                        int((i + 1) / total_tracks * 100))
-                    else:
-                        self.successful_tracks.append(track)
-                        self.progress.emit(f"Successfully downloaded: {track.title} - {track.artists}", 
-                                        int((i + 1) / total_tracks * 100))
-                else:
-                    self.failed_tracks.append((track.title, track.artists, error_message))
-                    self.progress.emit(f"Failed to download: {track.title} - {track.artists}\nError: {error_message}", 
-                                    int((i + 1) / total_tracks * 100))
-
-            if not self.is_stopped:
-                success_message = "Download completed!"
-                if self.failed_tracks:
-                    success_message += f"\n\nFailed downloads: {len(self.failed_tracks)} tracks"
-                if self.successful_tracks:
-                    success_message += f"\n\nSuccessful downloads: {len(self.successful_tracks)} tracks"
-                if self.skipped_tracks:
-                    success_message += f"\n\nSkipped (already exists): {len(self.skipped_tracks)} tracks"
-                self.finished.emit(True, success_message, self.failed_tracks, self.successful_tracks, self.skipped_tracks)
-                
-        except Exception as e:
-            self.finished.emit(False, str(e), self.failed_tracks, self.successful_tracks, self.skipped_tracks)
+        self.runner.run()
+
+    def wake(self):
+        self.runner.wake()
 
     def pause(self):
-        self.is_paused = True
-        self.progress.emit("Download process paused.", 0)
+        self.runner.pause()
 
     def resume(self):
-        self.is_paused = False
-        self.progress.emit("Download process resumed.", 0)
+        self.runner.resume()
 
     def stop(self): 
-        self.is_stopped = True
-        self.is_paused = False
+        self.runner.stop()
 
 class UpdateDialog(QDialog):
     def __init__(self, current_version, new_version, parent=None):
@@ -418,8 +231,9 @@ class SpotiDownloaderGUI(QWidget):
     def __init__(self):
         super().__init__()
         self.current_version = "5.4" 
-        self.tracks = []
-        self.all_tracks = []  
+        self.track_model = TrackListModel()
+        self.track_proxy = TrackFilterProxyModel()
+        self.track_proxy.setSourceModel(self.track_model)
         self.album_or_playlist_name = ''
         self.reset_state()
         
@@ -431,6 +245,10 @@ class SpotiDownloaderGUI(QWidget):
         self.use_track_numbers = self.settings.value('use_track_numbers', False, type=bool)
         self.use_artist_subfolders = self.settings.value('use_artist_subfolders', False, type=bool)
         self.use_album_subfolders = self.settings.value('use_album_subfolders', False, type=bool)
+        self.concurrent_downloads = self.settings.value('concurrent_downloads', 1, type=int)
+        self.playlist_sync = self.settings.value('playlist_sync', False, type=bool)
+        self.async_metadata = self.settings.value('async_metadata', False, type=bool)
+        self.existing_file_action = self.settings.value('existing_file_action', 'skip')
         self.auto_refresh_fetch = self.settings.value('auto_refresh_fetch', True, type=bool)
         self.check_for_updates = self.settings.value('check_for_updates', True, type=bool)
         self.token_fetch_mode = self.settings.value('token_fetch_mode', 'fast')
@@ -438,6 +256,7 @@ class SpotiDownloaderGUI(QWidget):
         self.current_theme_color = self.settings.value('theme_color', '#2196F3')
         self.track_list_format = self.settings.value('track_list_format', 'track_artist_date_duration')
         self.date_format = self.settings.value('date_format', 'dd_mm_yyyy')
+        self.update_track_list_display()
         
         self.elapsed_time = QTime(0, 0, 0)
         self.timer = QTimer(self)
@@ -446,8 +265,8 @@ class SpotiDownloaderGUI(QWidget):
         self.token_auto_refresh_timer = QTimer(self)
         self.token_auto_refresh_timer.timeout.connect(self.handle_auto_token_refresh)
         
-        self.network_manager = QNetworkAccessManager()
-        self.network_manager.finished.connect(self.on_cover_loaded)
+        self.cover_threads = []
+        self.current_cover_url = ''
         
         self.initUI()
         
@@ -493,20 +312,17 @@ class SpotiDownloaderGUI(QWidget):
 
     @staticmethod
     def format_duration(ms):
-        minutes = ms // 60000
-        seconds = (ms % 60000) // 1000
-        return f"{minutes}:{seconds:02d}"
+        return format_duration(ms)
     
     def reset_state(self):
-        self.tracks.clear()
-        self.all_tracks.clear()
+        self.track_model.set_tracks([])
+        self.pending_sync = None
         self.is_album = False
         self.is_playlist = False 
         self.is_single_track = False
         self.album_or_playlist_name = ''
 
     def reset_ui(self):
-        self.track_list.clear()
         self.track_list.show()
         self.log_output.clear()
         self.progress_bar.setValue(0)
@@ -586,88 +402,13 @@ class SpotiDownloaderGUI(QWidget):
         self.main_layout.addLayout(spotify_layout)
         
     def filter_tracks(self):
-        search_text = self.search_input.text().lower().strip()
-        
-        if not search_text:
-            self.tracks = self.all_tracks.copy()
-        else:
-            self.tracks = [
-                track for track in self.all_tracks
-                if (search_text in track.title.lower() or 
-                    search_text in track.artists.lower() or 
-                    search_text in track.album.lower())
-            ]
-        
-        self.update_track_list_display()
-
-    def format_track_date(self, release_date):
-        if not release_date:
-            return ""
-        
-        try:
-            if len(release_date) == 4:
-                date_obj = datetime.strptime(release_date, "%Y")
-                if self.date_format == "yyyy":
-                    return date_obj.strftime('%Y')
-                else:
-                    return date_obj.strftime('%Y')
-            elif len(release_date) == 7:
-                date_obj = datetime.strptime(release_date, "%Y-%m")
-                if self.date_format == "dd_mm_yyyy":
-                    return date_obj.strftime('%m-%Y')
-                elif self.date_format == "yyyy_mm_dd":
-                    return date_obj.strftime('%Y-%m')
-                else:
-                    return date_obj.strftime('%Y')
-            else:
-                date_obj = datetime.strptime(release_date, "%Y-%m-%d")
-                if self.date_format == "dd_mm_yyyy":
-                    return date_obj.strftime('%d-%m-%Y')
-                elif self.date_format == "yyyy_mm_dd":
-                    return date_obj.strftime('%Y-%m-%d')
-                else:
-                    return date_obj.strftime('%Y')
-        except ValueError:
-            return release_date
+        self.track_proxy.set_search_text(self.search_input.text())
 
     def update_track_list_display(self):
-        self.track_list.clear()
-        for i, track in enumerate(self.tracks, 1):
-            duration = self.format_duration(track.duration_ms)
-            formatted_date = self.format_track_date(track.release_date)
-            
-            if self.track_list_format == "artist_track_date_duration":
-                display_parts = [f"{i}. {track.artists} - {track.title}"]
-                if formatted_date:
-                    display_parts.append(formatted_date)
-                display_parts.append(duration)
-                display_text = " • ".join(display_parts)
-            elif self.track_list_format == "track_artist_date":
-                display_parts = [f"{i}. {track.title} - {track.artists}"]
-                if formatted_date:
-                    display_parts.append(formatted_date)
-                display_text = " • ".join(display_parts)
-            elif self.track_list_format == "artist_track_date":
-                display_parts = [f"{i}. {track.artists} - {track.title}"]
-                if formatted_date:
-                    display_parts.append(formatted_date)
-                display_text = " • ".join(display_parts)
-            elif self.track_list_format == "track_artist_duration":
-                display_text = f"{i}. {track.title} - {track.artists} • {duration}"
-            elif self.track_list_format == "artist_track_duration":
-                display_text = f"{i}. {track.artists} - {track.title} • {duration}"
-            elif self.track_list_format == "track_artist":
-                display_text = f"{i}. {track.title} - {track.artists}"
-            elif self.track_list_format == "artist_track":
-                display_text = f"{i}. {track.artists} - {track.title}"
-            else:
-                display_parts = [f"{i}. {track.title} - {track.artists}"]
-                if formatted_date:
-                    display_parts.append(formatted_date)
-                display_parts.append(duration)
-                display_text = " • ".join(display_parts)
-            
-            self.track_list.addItem(display_text)
+        self.track_model.set_format(self.track_list_format, self.date_format)
+
+    def get_selected_rows(self):
+        return sorted(index.row() for index in self.track_list.selectionModel().selectedRows())
 
     def browse_output(self):
         directory = QFileDialog.getExistingDirectory(self, "Select Output Directory")
@@ -680,6 +421,7 @@ class SpotiDownloaderGUI(QWidget):
         self.main_layout.addWidget(self.tab_widget)
 
         self.setup_dashboard_tab()
+        self.setup_queue_tab()
         self.setup_process_tab()
         self.setup_settings_tab()
         self.setup_theme_tab()
@@ -692,7 +434,10 @@ class SpotiDownloaderGUI(QWidget):
         self.setup_info_widget()
         dashboard_layout.addWidget(self.info_widget)
 
-        self.track_list = QListWidget()
+        self.track_list = QListView()
+        self.track_list.setModel(self.track_proxy)
+        self.track_list.setUniformItemSizes(True)
+        self.track_list.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
         self.track_list.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
         dashboard_layout.addWidget(self.track_list)
         
@@ -706,6 +451,64 @@ class SpotiDownloaderGUI(QWidget):
 
         self.hide_track_buttons()
 
+    def setup_queue_tab(self):
+        self.queue_tab = QWidget()
+        queue_layout = QVBoxLayout()
+
+        self.queue_list = QListWidget()
+        self.queue_list.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        queue_layout.addWidget(self.queue_list)
+
+        queue_btn_layout = QHBoxLayout()
+        self.add_queue_btn = QPushButton('Add URLs')
+        self.start_queue_btn = QPushButton('Start Queue')
+        self.remove_queue_btn = QPushButton('Remove')
+        self.clear_queue_btn = QPushButton('Clear Finished')
+
+        for btn in [self.add_queue_btn, self.start_queue_btn, self.remove_queue_btn, self.clear_queue_btn]:
+            btn.setFixedWidth(120)
+            btn.setCursor(Qt.CursorShape.PointingHandCursor)
+
+        self.add_queue_btn.clicked.connect(self.add_queue_urls)
+        self.start_queue_btn.clicked.connect(self.start_queue)
+        self.remove_queue_btn.clicked.connect(self.remove_queue_jobs)
+        self.clear_queue_btn.clicked.connect(self.clear_finished_jobs)
+
+        queue_btn_layout.addStretch()
+        queue_btn_layout.addWidget(self.add_queue_btn)
+        queue_btn_layout.addWidget(self.start_queue_btn)
+        queue_btn_layout.addWidget(self.remove_queue_btn)
+        queue_btn_layout.addWidget(self.clear_queue_btn)
+        queue_btn_layout.addStretch()
+        queue_layout.addLayout(queue_btn_layout)
+
+        self.queue_tab.setLayout(queue_layout)
+        self.tab_widget.addTab(self.queue_tab, "Queue")
+
+        self.update_queue_list()
+
+    def format_job(self, job):
+        status = job.status.title()
+        if job.status in ("queued", "fetching") or not job.name:
+            text = f"[{status}] {job.url}"
+        else:
+            text = f"[{status}] {job.name} • {job.total} tracks"
+        if job.status == "done" and job.total:
+            text += f" ({job.downloaded} downloaded, {job.skipped} skipped, {job.failed} failed)"
+        if job.error:
+            text += f" • {job.error}"
+        return text
+
+    def update_queue_list(self, job=None):
+        jobs = job_queue.list()
+        self.queue_list.clear()
+        for job in jobs:
+            self.queue_list.addItem(self.format_job(job))
+        self.queue_jobs = jobs
+        pending = sum(1 for job in jobs if job.status not in ("done", "error"))
+        self.tab_widget.setTabText(self.tab_widget.indexOf(self.queue_tab),
+                                   f"Queue ({pending})" if pending else "Queue")
+
     def setup_info_widget(self):
         self.info_widget = QWidget()
         info_layout = QHBoxLayout()
@@ -823,6 +626,9 @@ class SpotiDownloaderGUI(QWidget):
         
         if hasattr(self, 'remove_successful_btn'):
             self.remove_successful_btn.setIcon(self.get_themed_icon('circle-x.svg'))
+        
+        if hasattr(self, 'retry_failed_btn'):
+            self.retry_failed_btn.setIcon(self.get_themed_icon('download.svg'))
 
     def setup_process_tab(self):
         self.process_tab = QWidget()
@@ -878,10 +684,18 @@ class SpotiDownloaderGUI(QWidget):
         self.remove_successful_btn.setCursor(Qt.CursorShape.PointingHandCursor)
         self.remove_successful_btn.clicked.connect(self.remove_successful_downloads)
         
+        self.retry_failed_btn = QPushButton(' Retry Failed')
+        self.retry_failed_btn.setIcon(self.get_themed_icon('download.svg'))
+        
+        self.retry_failed_btn.setFixedWidth(150)
+        self.retry_failed_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.retry_failed_btn.clicked.connect(self.retry_failed_downloads)
+        
         control_layout.addStretch()
         control_layout.addWidget(self.stop_btn)
         control_layout.addWidget(self.pause_resume_btn)
         control_layout.addWidget(self.remove_successful_btn)
+        control_layout.addWidget(self.retry_failed_btn)
         control_layout.addStretch()
         
         process_layout.addLayout(control_layout)
@@ -895,6 +709,12 @@ class SpotiDownloaderGUI(QWidget):
         self.stop_btn.hide()
         self.pause_resume_btn.hide()
         self.remove_successful_btn.hide()
+        self.update_retry_failed_button()
+
+    def update_retry_failed_button(self):
+        failed_count = dead_letter_queue.count()
+        self.retry_failed_btn.setText(f' Retry Failed ({failed_count})')
+        self.retry_failed_btn.setVisible(failed_count > 0)
 
     def setup_settings_tab(self):
         settings_tab = QWidget()
@@ -1045,6 +865,51 @@ class SpotiDownloaderGUI(QWidget):
         checkbox_layout.addStretch()
         file_layout.addLayout(checkbox_layout)
         
+        concurrency_layout = QHBoxLayout()
+        concurrency_label = QLabel('Concurrent Downloads:')
+        
+        self.concurrent_downloads_dropdown = QComboBox()
+        for count in [1, 2, 3, 4, 6, 8]:
+            self.concurrent_downloads_dropdown.addItem(str(count), count)
+        self.concurrent_downloads_dropdown.setFixedWidth(60)
+        self.concurrent_downloads_dropdown.currentIndexChanged.connect(self.save_concurrent_downloads)
+        
+        concurrency_layout.addWidget(concurrency_label)
+        concurrency_layout.addWidget(self.concurrent_downloads_dropdown)
+        concurrency_layout.addSpacing(15)
+        
+        self.playlist_sync_checkbox = QCheckBox('Playlist Sync (New Tracks Only)')
+        self.playlist_sync_checkbox.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.playlist_sync_checkbox.setToolTip("Only list tracks added since the playlist was last fetched")
+        self.playlist_sync_checkbox.setChecked(self.playlist_sync)
+        self.playlist_sync_checkbox.toggled.connect(self.save_playlist_sync_setting)
+        concurrency_layout.addWidget(self.playlist_sync_checkbox)
+        concurrency_layout.addSpacing(10)
+        
+        self.async_metadata_checkbox = QCheckBox('Async Metadata')
+        self.async_metadata_checkbox.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.async_metadata_checkbox.setToolTip("Fetch metadata with the asyncio backend (requires aiohttp)")
+        self.async_metadata_checkbox.setChecked(self.async_metadata)
+        self.async_metadata_checkbox.toggled.connect(self.save_async_metadata_setting)
+        concurrency_layout.addWidget(self.async_metadata_checkbox)
+        concurrency_layout.addStretch()
+        file_layout.addLayout(concurrency_layout)
+        
+        existing_layout = QHBoxLayout()
+        existing_label = QLabel('Already in Library:')
+        
+        self.existing_file_dropdown = QComboBox()
+        self.existing_file_dropdown.addItem("Skip", "skip")
+        self.existing_file_dropdown.addItem("Hard-link into new layout", "link")
+        self.existing_file_dropdown.addItem("Move into new layout", "move")
+        self.existing_file_dropdown.setToolTip("What to do with tracks found elsewhere under the output folder (matched by Spotify ID or ISRC)")
+        self.existing_file_dropdown.currentIndexChanged.connect(self.save_existing_file_action)
+        
+        existing_layout.addWidget(existing_label)
+        existing_layout.addWidget(self.existing_file_dropdown)
+        existing_layout.addStretch()
+        file_layout.addLayout(existing_layout)
+        
         settings_layout.addWidget(file_group)
         
         download_group = QWidget()
@@ -1104,6 +969,8 @@ class SpotiDownloaderGUI(QWidget):
         
         self.set_combobox_value(self.track_list_format_dropdown, self.track_list_format)
         self.set_combobox_value(self.date_format_dropdown, self.date_format)
+        self.set_combobox_value(self.concurrent_downloads_dropdown, self.concurrent_downloads)
+        self.set_combobox_value(self.existing_file_dropdown, self.existing_file_action)
         
     def setup_theme_tab(self):
         theme_tab = QWidget()
@@ -1349,6 +1216,26 @@ class SpotiDownloaderGUI(QWidget):
         self.settings.setValue('use_album_subfolders', self.use_album_subfolders)
         self.settings.sync()
     
+    def save_concurrent_downloads(self):
+        self.concurrent_downloads = self.concurrent_downloads_dropdown.currentData()
+        self.settings.setValue('concurrent_downloads', self.concurrent_downloads)
+        self.settings.sync()
+    
+    def save_playlist_sync_setting(self):
+        self.playlist_sync = self.playlist_sync_checkbox.isChecked()
+        self.settings.setValue('playlist_sync', self.playlist_sync)
+        self.settings.sync()
+    
+    def save_async_metadata_setting(self):
+        self.async_metadata = self.async_metadata_checkbox.isChecked()
+        self.settings.setValue('async_metadata', self.async_metadata)
+        self.settings.sync()
+    
+    def save_existing_file_action(self):
+        self.existing_file_action = self.existing_file_dropdown.currentData()
+        self.settings.setValue('existing_file_action', self.existing_file_action)
+        self.settings.sync()
+    
     def save_token(self):
         self.settings.setValue('spotify_token', self.token_input.text().strip())
         self.settings.sync()
@@ -1384,16 +1271,14 @@ class SpotiDownloaderGUI(QWidget):
         self.track_list_format = format_value
         self.settings.setValue('track_list_format', format_value)
         self.settings.sync()
-        if self.tracks:
-            self.update_track_list_display()
+        self.update_track_list_display()
     
     def save_date_format(self):
         format_value = self.date_format_dropdown.currentData()
         self.date_format = format_value
         self.settings.setValue('date_format', format_value)
         self.settings.sync()
-        if self.tracks:
-            self.update_track_list_display()
+        self.update_track_list_display()
 
     def set_combobox_value(self, combobox, target_value):
         for i in range(combobox.count()):
@@ -1503,7 +1388,7 @@ class SpotiDownloaderGUI(QWidget):
         self.log_output.append('Just a moment. Fetching metadata...')
         self.tab_widget.setCurrentWidget(self.process_tab)
         
-        self.fetch_thread = FetchTracksThread(url)
+        self.fetch_thread = FetchTracksThread(url, sync=self.playlist_sync, use_async=self.async_metadata)
         self.fetch_thread.finished.connect(self.on_fetch_complete)
         self.fetch_thread.error.connect(self.on_fetch_error)
         self.fetch_thread.start()
@@ -1511,6 +1396,7 @@ class SpotiDownloaderGUI(QWidget):
     def on_fetch_complete(self, data):
         metadata = data["metadata"]
         url_info = data["url_info"]
+        self.log_output.append(data["fetch_stats"])
         
         if url_info["type"] == "track":
             self.handle_track_metadata(metadata["track"])
@@ -1566,23 +1452,9 @@ class SpotiDownloaderGUI(QWidget):
                 QTimer.singleShot(1000, self.fetch_tracks)
 
     def handle_track_metadata(self, track_data):
-        track = Track(
-            id=track_data["id"],
-            title=track_data["name"],
-            artists=track_data["artists"],
-            album=track_data["album_name"],
-            track_number=1,
-            duration_ms=track_data.get("duration_ms", 0),
-            isrc=track_data.get("isrc", ""),
-            image_url=track_data.get("images", ""),
-            release_date=track_data.get("release_date", "")
-        )
-        
-        self.tracks = [track]
-        self.all_tracks = [track]
-        self.is_single_track = True
-        self.is_album = self.is_playlist = False
-        self.album_or_playlist_name = f"{self.tracks[0].title} - {self.tracks[0].artists}"
+        tracks, context = get_download_plan({"track": track_data}, "track")
+        self.track_model.set_tracks(tracks)
+        self.apply_download_context(context)
         
         metadata = {
             'title': track_data["name"],
@@ -1594,26 +1466,9 @@ class SpotiDownloaderGUI(QWidget):
         self.update_display_after_fetch(metadata)
 
     def handle_album_metadata(self, album_data):
-        self.album_or_playlist_name = album_data["album_info"]["name"]
-        self.tracks = []
-        
-        for track in album_data["track_list"]:
-            track_id = track.get("id", "")
-            self.tracks.append(Track(
-                id=track_id,
-                title=track["name"],
-                artists=track["artists"],
-                album=self.album_or_playlist_name,
-                track_number=track["track_number"],
-                duration_ms=track.get("duration_ms", 0),
-                isrc=track.get("isrc", ""),
-                image_url=track.get("images", ""),
-                release_date=track.get("release_date", "")
-            ))
-        
-        self.all_tracks = self.tracks.copy()
-        self.is_album = True
-        self.is_playlist = self.is_single_track = False
+        tracks, context = get_download_plan(album_data, "album")
+        self.track_model.set_tracks(tracks)
+        self.apply_download_context(context)
         
         metadata = {
             'title': album_data["album_info"]["name"],
@@ -1625,26 +1480,22 @@ class SpotiDownloaderGUI(QWidget):
         self.update_display_after_fetch(metadata)
 
     def handle_playlist_metadata(self, playlist_data):
-        self.album_or_playlist_name = playlist_data["playlist_info"]["owner"]["name"]
-        self.tracks = []
-        
-        for track in playlist_data["track_list"]:
-            track_id = track.get("id", "")
-            self.tracks.append(Track(
-                id=track_id,
-                title=track["name"],
-                artists=track["artists"],
-                album=track["album_name"],
-                track_number=track.get("track_number", len(self.tracks) + 1),
-                duration_ms=track.get("duration_ms", 0),
-                isrc=track.get("isrc", ""),
-                image_url=track.get("images", ""),
-                release_date=track.get("release_date", "")
-            ))
-        
-        self.all_tracks = self.tracks.copy()
-        self.is_playlist = True
-        self.is_album = self.is_single_track = False
+        sync_info = playlist_data["playlist_info"].get("sync")
+        if sync_info:
+            if sync_info["unchanged"]:
+                self.log_output.append("Playlist sync: no changes since last sync.")
+            elif sync_info["first_sync"]:
+                self.log_output.append(f"Playlist sync: first sync, {sync_info['added']} tracks recorded.")
+            else:
+                self.log_output.append(f"Playlist sync: {sync_info['added']} new tracks, {sync_info['removed']} removed since last sync.")
+        
+        tracks, context = get_download_plan(playlist_data, "playlist")
+        self.track_model.set_tracks(tracks)
+        self.pending_sync = get_pending_sync(playlist_data)
+        if not tracks:
+            commit_playlist_sync(self.pending_sync, [])
+            self.pending_sync = None
+        self.apply_download_context(context)
         
         metadata = {
             'title': playlist_data["playlist_info"]["owner"]["name"],
@@ -1657,37 +1508,26 @@ class SpotiDownloaderGUI(QWidget):
 
     def handle_discography_metadata(self, discography_data):
         artist_info = discography_data["artist_info"]
-        self.album_or_playlist_name = f"{artist_info['name']} - Discography ({artist_info['discography_type'].title()})"
-        self.tracks = []
-        
-        for track in discography_data["track_list"]:
-            track_id = track.get("id", "")
-            self.tracks.append(Track(
-                id=track_id,
-                title=track["name"],
-                artists=track["artists"],
-                album=track["album_name"],
-                track_number=track.get("track_number", len(self.tracks) + 1),
-                duration_ms=track.get("duration_ms", 0),
-                isrc=track.get("isrc", ""),
-                image_url=track.get("images", ""),
-                release_date=track.get("release_date", "")
-            ))
-        
-        self.all_tracks = self.tracks.copy()
-        self.is_playlist = True
-        self.is_album = self.is_single_track = False
+        tracks, context = get_download_plan(discography_data, "artist_discography")
+        self.track_model.set_tracks(tracks)
+        self.apply_download_context(context)
         
         metadata = {
             'title': f"{artist_info['name']} - Discography",
             'artists': f"{artist_info['discography_type'].title()} • {artist_info['total_albums']} albums",
             'cover': artist_info["images"],
             'followers': artist_info.get("followers", 0),
-            'total_tracks': len(self.tracks),
+            'total_tracks': len(self.track_model.tracks),
             'discography_type': artist_info['discography_type']
         }
         self.update_display_after_fetch(metadata)
 
+    def apply_download_context(self, context):
+        self.is_single_track = context["is_single_track"]
+        self.is_album = context["is_album"]
+        self.is_playlist = context["is_playlist"]
+        self.album_or_playlist_name = context["album_or_playlist_name"]
+
     def handle_artist_metadata(self, artist_data):
         self.reset_state()
         
@@ -1762,7 +1602,7 @@ class SpotiDownloaderGUI(QWidget):
             else:
                 self.type_label.setText(f"<b>Playlist</b> • {total_tracks} tracks")
         
-        self.network_manager.get(QNetworkRequest(QUrl(metadata['cover'])))
+        self.load_cover(metadata['cover'])
         
         self.info_widget.show()
 
@@ -1782,7 +1622,7 @@ class SpotiDownloaderGUI(QWidget):
         self.release_date_label.hide()
         self.type_label.setText("<b>Artist Profile</b> • No tracks available for download")
         
-        self.network_manager.get(QNetworkRequest(QUrl(metadata['cover'])))
+        self.load_cover(metadata['cover'])
         
         self.track_list.hide()
         self.search_widget.hide()
@@ -1799,12 +1639,23 @@ class SpotiDownloaderGUI(QWidget):
         self.cover_label.clear()
         self.info_widget.hide()
 
-    def on_cover_loaded(self, reply):
-        if reply.error() == QNetworkReply.NetworkError.NoError:
-            data = reply.readAll()
-            pixmap = QPixmap()
-            pixmap.loadFromData(data)
-            self.cover_label.setPixmap(pixmap)
+    def load_cover(self, url):
+        self.current_cover_url = url
+        if not url:
+            return
+        
+        cover_thread = CoverFetchThread(url)
+        cover_thread.loaded.connect(self.on_cover_loaded)
+        cover_thread.finished.connect(lambda: self.cover_threads.remove(cover_thread))
+        self.cover_threads.append(cover_thread)
+        cover_thread.start()
+
+    def on_cover_loaded(self, url, data):
+        if url != self.current_cover_url:
+            return
+        pixmap = QPixmap()
+        pixmap.loadFromData(data)
+        self.cover_label.setPixmap(pixmap)
 
     def update_button_states(self):
         if self.is_single_track:
@@ -1840,24 +1691,24 @@ class SpotiDownloaderGUI(QWidget):
         if self.is_single_track:
             self.start_download([0])
         else:
-            selected_items = self.track_list.selectedItems()
+            selected_rows = self.get_selected_rows()
             
-            if not selected_items:
+            if not selected_rows:
                 reply = QMessageBox.question(
                     self,
                     'Confirm Download All',
-                    f'No tracks selected. Download all {len(self.tracks)} tracks?',
+                    f'No tracks selected. Download all {self.track_proxy.rowCount()} tracks?',
                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
                     QMessageBox.StandardButton.No
                 )
                 
                 if reply == QMessageBox.StandardButton.Yes:
-                    self.start_download(range(len(self.tracks)))
+                    self.start_download(range(self.track_proxy.rowCount()))
             else:
-                selected_indices = [self.track_list.row(item) for item in selected_items]
-                self.start_download(selected_indices)
+                self.start_download(selected_rows)
     
     def start_download(self, indices):
+        self.retry_groups = []
         self.log_output.clear()
         outpath = self.output_dir.text()
         if not os.path.exists(outpath):
@@ -1868,33 +1719,139 @@ class SpotiDownloaderGUI(QWidget):
             self.log_output.append("Error: Please enter your token")
             return
 
-        tracks_to_download = self.tracks if self.is_single_track else [self.tracks[i] for i in indices]
+        tracks_to_download = list(self.track_model.tracks) if self.is_single_track else self.track_proxy.get_tracks(indices)
 
-        if self.is_album or self.is_playlist:
-            folder_name = re.sub(r'[<>:"/\\|?*]', '_', self.album_or_playlist_name)
-            outpath = os.path.join(outpath, folder_name)
-            os.makedirs(outpath, exist_ok=True)
+        outpath = get_job_outpath(outpath, {
+            "is_album": self.is_album,
+            "is_playlist": self.is_playlist,
+            "album_or_playlist_name": self.album_or_playlist_name
+        })
+        os.makedirs(outpath, exist_ok=True)
 
         try:
             self.start_download_worker(tracks_to_download, outpath)
         except Exception as e:
             self.log_output.append(f"Error: An error occurred while starting the download: {str(e)}")
 
-    def start_download_worker(self, tracks_to_download, outpath):
+    def retry_failed_downloads(self):
+        if not self.token_input.text().strip():
+            self.log_output.append("Error: Please enter your token")
+            return
+        
+        self.retry_groups = dead_letter_queue.groups()
+        if not self.retry_groups:
+            self.update_retry_failed_button()
+            return
+        
+        self.log_output.clear()
+        failed_count = sum(len(tracks) for _, tracks in self.retry_groups)
+        self.log_output.append(f"Retrying {failed_count} failed tracks...")
+        self.start_next_retry_group()
+
+    def start_next_retry_group(self):
+        context, tracks = self.retry_groups.pop(0)
+        try:
+            os.makedirs(context["outpath"], exist_ok=True)
+            self.start_download_worker([Track(**track) for track in tracks], context["outpath"], context)
+        except Exception as e:
+            self.retry_groups = []
+            self.log_output.append(f"Error: An error occurred while starting the download: {str(e)}")
+
+    def add_queue_urls(self):
+        text, ok = QInputDialog.getMultiLineText(self, "Add URLs", "Spotify URLs (one per line):", self.spotify_url.text().strip())
+        if not ok:
+            return
+        
+        urls = []
+        for url in text.split():
+            try:
+                parse_uri(url)
+                urls.append(url)
+            except Exception:
+                self.log_output.append(f"Warning: Skipped invalid Spotify URL: {url}")
+        
+        added = job_queue.add(urls)
+        self.update_queue_list()
+        if added and isinstance(getattr(self, 'worker', None), JobQueueWorker) and self.worker.isRunning():
+            self.worker.wake()
+
+    def remove_queue_jobs(self):
+        selected_rows = [self.queue_list.row(item) for item in self.queue_list.selectedItems()]
+        if not selected_rows:
+            return
+        job_queue.remove({self.queue_jobs[row].id for row in selected_rows})
+        self.update_queue_list()
+
+    def clear_finished_jobs(self):
+        job_queue.clear_finished()
+        self.update_queue_list()
+
+    def start_queue(self):
+        if not job_queue.count():
+            self.log_output.append('Warning: The queue is empty. Add URLs first.')
+            return
+        
+        outpath = self.output_dir.text()
+        if not os.path.exists(outpath):
+            self.log_output.append('Warning: Invalid output directory.')
+            return
+
+        if not self.token_input.text().strip():
+            self.log_output.append("Error: Please enter your token")
+            return
+
+        self.retry_groups = []
+        self.log_output.clear()
+        self.log_output.append(f"Starting queue with {job_queue.count()} jobs...")
+        
+        self.worker = JobQueueWorker(
+            job_queue,
+            self.token_input.text().strip(),
+            outpath,
+            self.concurrent_downloads,
+            {
+                "filename_format": self.filename_format,
+                "use_track_numbers": self.use_track_numbers,
+                "use_artist_subfolders": self.use_artist_subfolders,
+                "use_album_subfolders": self.use_album_subfolders,
+                "existing_file_action": self.existing_file_action
+            },
+            self.playlist_sync,
+            self.async_metadata
+        )
+        
+        self.worker.finished.connect(self.on_download_finished)
+        self.worker.progress.connect(self.update_progress)
+        self.worker.job_updated.connect(self.update_queue_list)
+        
+        self.worker.start()
+        self.start_timer()
+        self.update_ui_for_download_start()
+
+    def start_download_worker(self, tracks_to_download, outpath, context=None):
         token = self.token_input.text().strip()
+        context = context or {
+            "is_single_track": self.is_single_track,
+            "is_album": self.is_album,
+            "is_playlist": self.is_playlist,
+            "album_or_playlist_name": self.album_or_playlist_name
+        }
         self.worker = DownloadWorker(
             self,
             tracks_to_download, 
             outpath, 
             token,
-            self.is_single_track, 
-            self.is_album, 
-            self.is_playlist, 
-            self.album_or_playlist_name,
+            context["is_single_track"], 
+            context["is_album"], 
+            context["is_playlist"], 
+            context["album_or_playlist_name"],
             self.filename_format,
             self.use_track_numbers,
             self.use_artist_subfolders,
-            self.use_album_subfolders
+            self.use_album_subfolders,
+            self.concurrent_downloads,
+            self.existing_file_action,
+            self.output_dir.text()
         )
         
         self.worker.finished.connect(self.on_download_finished)
@@ -1906,6 +1863,7 @@ class SpotiDownloaderGUI(QWidget):
 
     def update_ui_for_download_start(self):
         self.download_btn.setEnabled(False)
+        self.start_queue_btn.setEnabled(False)
         
         if hasattr(self, 'single_download_btn'):
             self.single_download_btn.setEnabled(False)
@@ -1914,6 +1872,7 @@ class SpotiDownloaderGUI(QWidget):
             
         self.stop_btn.show()
         self.pause_resume_btn.show()
+        self.retry_failed_btn.hide()
         self.progress_bar.show()
         self.progress_bar.setValue(0)
         
@@ -1926,6 +1885,7 @@ class SpotiDownloaderGUI(QWidget):
             self.progress_bar.setValue(percentage)
 
     def stop_download(self):
+        self.retry_groups = []
         if hasattr(self, 'worker'):
             self.worker.stop()
         self.stop_timer()
@@ -1943,6 +1903,7 @@ class SpotiDownloaderGUI(QWidget):
         
         self.successful_downloads = successful_tracks
         self.skipped_downloads = skipped_tracks
+        commit_playlist_sync(self.pending_sync, [track.id for track in successful_tracks + skipped_tracks])
         
         if (hasattr(self, 'successful_downloads') and self.successful_downloads) or (hasattr(self, 'skipped_downloads') and self.skipped_downloads):
             self.remove_successful_btn.show()
@@ -1950,6 +1911,8 @@ class SpotiDownloaderGUI(QWidget):
             self.remove_successful_btn.hide()
         
         self.download_btn.setEnabled(True)
+        self.start_queue_btn.setEnabled(True)
+        self.update_queue_list()
         
         if hasattr(self, 'single_download_btn'):
             self.single_download_btn.setEnabled(True)
@@ -1967,6 +1930,11 @@ class SpotiDownloaderGUI(QWidget):
             self.log_output.append(f"Error: {message}")
 
         self.tab_widget.setCurrentWidget(self.process_tab)
+        
+        if getattr(self, 'retry_groups', None):
+            self.start_next_retry_group()
+        else:
+            self.update_retry_failed_button()
     
     def toggle_pause_resume(self):
         if hasattr(self, 'worker'):
@@ -1986,35 +1954,18 @@ class SpotiDownloaderGUI(QWidget):
             self.log_output.append("No downloaded or skipped tracks to remove.")
             return
         
-        tracks_to_remove = []
-        
-        for track in self.tracks:
-            for successful_track in successful_tracks:
-                if (track.title == successful_track.title and 
-                    track.artists == successful_track.artists and
-                    track.album == successful_track.album):
-                    tracks_to_remove.append(track)
-                    break
-        
-        for track in self.tracks:
-            for skipped_track in skipped_tracks:
-                if (track.title == skipped_track.title and 
-                    track.artists == skipped_track.artists and
-                    track.album == skipped_track.album):
-                    if track not in tracks_to_remove:
-                        tracks_to_remove.append(track)
-                    break
+        successful_keys = {(track.title, track.artists, track.album) for track in successful_tracks}
+        skipped_keys = {(track.title, track.artists, track.album) for track in skipped_tracks}
+        tracks_to_remove = [
+            track for track in self.track_proxy.get_tracks()
+            if (track.title, track.artists, track.album) in successful_keys
+            or (track.title, track.artists, track.album) in skipped_keys
+        ]
         
         if tracks_to_remove:
-            for track in tracks_to_remove:
-                if track in self.tracks:
-                    self.tracks.remove(track)
-                if track in self.all_tracks:
-                    self.all_tracks.remove(track)
-            
-            self.update_track_list_display()
-            successful_count = len([t for t in tracks_to_remove if t in successful_tracks])
-            skipped_count = len([t for t in tracks_to_remove if t in skipped_tracks])
+            self.track_model.remove_tracks(tracks_to_remove)
+            successful_count = sum(1 for t in tracks_to_remove if (t.title, t.artists, t.album) in successful_keys)
+            skipped_count = sum(1 for t in tracks_to_remove if (t.title, t.artists, t.album) in skipped_keys)
             
             message = f"Removed {len(tracks_to_remove)} tracks from the list"
             if successful_count > 0:
@@ -2036,13 +1987,13 @@ class SpotiDownloaderGUI(QWidget):
             self.reset_state()
             self.reset_ui()
         else:
-            selected_items = self.track_list.selectedItems()
+            selected_rows = self.get_selected_rows()
             
-            if not selected_items:
+            if not selected_rows:
                 reply = QMessageBox.question(
                     self,
                     'Confirm Delete All',
-                    f'No tracks selected. Delete all {len(self.tracks)} tracks?',
+                    f'No tracks selected. Delete all {self.track_proxy.rowCount()} tracks?',
                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
                     QMessageBox.StandardButton.No
                 )
@@ -2051,16 +2002,7 @@ class SpotiDownloaderGUI(QWidget):
                     self.reset_state()
                     self.reset_ui()
             else:
-                selected_indices = [self.track_list.row(item) for item in selected_items]
-                tracks_to_remove = [self.tracks[i] for i in selected_indices]
-                
-                for track in tracks_to_remove:
-                    if track in self.tracks:
-                        self.tracks.remove(track)
-                    if track in self.all_tracks:
-                        self.all_tracks.remove(track)
-                
-                self.update_track_list_display()
+                self.track_model.remove_tracks(self.track_proxy.get_tracks(selected_rows))
         self.tab_widget.setCurrentIndex(0)
 
     def update_timer(self):
@@ -0,0 +1,7 @@
+import os
+from pathlib import Path
+
+def get_data_dir():
+    path = Path(os.environ.get("SPOTIDOWNLOADER_DATA_DIR", Path.home() / ".spotidownloader"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from stub_servers import start_download_stub
+
+def make_tracks(count, base_url):
+    from downloadEngine import Track
+    return [Track(id=f"bench{i}", title=f"Track {i}", artists="Bench Artist", album="Bench Album",
+                  track_number=i + 1, duration_ms=180000, isrc=f"BENCH{i:05d}",
+                  image_url=f"{base_url}/cover/{i % 4}.jpg", release_date="2024-01-01")
+            for i in range(count)]
+
+def run(tracks, workers, output_root):
+    from downloadEngine import DownloadEngine
+
+    outpath = tempfile.mkdtemp(dir=output_root)
+    statuses = {"downloaded": 0, "skipped": 0, "failed": 0}
+    transferred = [0]
+
+    def on_event(event, **fields):
+        if event == "track_finished":
+            statuses[fields["status"]] += 1
+        elif event == "track_progress" and fields["received"] == fields["total"]:
+            transferred[0] += fields["total"]
+
+    engine = DownloadEngine(tracks, outpath, "bench", is_album=True, album_or_playlist_name="Bench Album",
+                            max_workers=workers, on_event=on_event)
+    start = time.perf_counter()
+    engine.run()
+    elapsed = time.perf_counter() - start
+
+    print(f"{workers:>2} workers  {len(tracks)} tracks in {elapsed:.2f}s -> "
+          f"{len(tracks) / elapsed:.2f} tracks/s, {transferred[0] / 1048576 / elapsed:.2f} MB/s "
+          f"({statuses['downloaded']} downloaded, {statuses['skipped']} skipped, {statuses['failed']} failed)")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Run DownloadEngine headless against a local fake download server")
+    parser.add_argument("--tracks", type=int, default=32)
+    parser.add_argument("--size", type=float, default=1.0, help="audio size per track in MB")
+    parser.add_argument("--latency", type=float, default=20, help="server latency per request in ms")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="spotidownloader-bench-")
+    os.environ["SPOTIDOWNLOADER_DATA_DIR"] = data_dir
+
+    import httpSession
+    import downloadEngine
+
+    server = start_download_stub(int(args.size * 1048576), args.latency / 1000)
+    base_url = server.url
+    downloadEngine.download_api_url = f"{base_url}/download"
+    httpSession.configure(pool_size=max(args.workers) * 2)
+
+    try:
+        tracks = make_tracks(args.tracks, base_url)
+        results = [run(tracks, workers, data_dir) for workers in args.workers]
+        print(f"speedup: {results[0] / min(results):.2f}x")
+    finally:
+        httpSession.close_all()
+        server.shutdown()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from stub_servers import start_spotify_stub, start_download_stub, point_at_stubs
+
+scenarios = {
+    "track": "https://open.spotify.com/track/a1x1t0",
+    "album": "https://open.spotify.com/album/a50x1",
+    "playlist": "https://open.spotify.com/playlist/p2000",
+    "discography": "https://open.spotify.com/artist/r40x12/discography/all",
+}
+
+spotify_calls = ("playlist", "playlist_tracks", "album", "album_tracks", "albums", "track", "tracks", "artist", "artist_albums")
+
+def get_peak_rss():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1048576 if sys.platform == "darwin" else peak / 1024
+
+def run_scenario(args):
+    import httpSession
+    from getMetadata import parse_uri
+    from downloadEngine import DownloadEngine, get_download_plan, get_job_outpath
+    from retryScheduler import dead_letter_queue
+
+    point_at_stubs(args.spotify_url, args.download_url)
+    httpSession.configure(pool_size=max(16, args.workers * 2))
+    if args.use_async:
+        from getMetadataAsync import get_filtered_data
+    else:
+        from getMetadata import get_filtered_data
+
+    url = scenarios[args.child]
+    started_at = time.perf_counter()
+    metadata = get_filtered_data(url)
+    fetch_time = time.perf_counter() - started_at
+    if "error" in metadata:
+        return {"error": metadata["error"]}
+
+    tracks, context = get_download_plan(metadata, parse_uri(url)["type"])
+    outpath = get_job_outpath(args.output, context)
+    os.makedirs(outpath, exist_ok=True)
+
+    statuses = {"downloaded": 0, "skipped": 0, "failed": 0}
+    transferred = [0]
+
+    def on_event(event, **fields):
+        if event == "track_finished":
+            statuses[fields["status"]] += 1
+        elif event == "track_progress" and fields["received"] == fields["total"]:
+            transferred[0] += fields["total"]
+
+    engine = DownloadEngine(
+        tracks, outpath, "bench",
+        context["is_single_track"], context["is_album"], context["is_playlist"], context["album_or_playlist_name"],
+        max_workers=args.workers, library_root=args.output, on_event=on_event
+    )
+    started_at = time.perf_counter()
+    engine.run()
+    download_time = time.perf_counter() - started_at
+    httpSession.close_all()
+
+    return {"tracks": len(tracks), "fetch_time": fetch_time, "download_time": download_time,
+            "bytes": transferred[0], "peak_rss": get_peak_rss(), "dead_letters": dead_letter_queue.count(), **statuses}
+
+def run_child(args, scenario, spotify_url, download_url):
+    root = tempfile.mkdtemp(prefix=f"spotidownloader-e2e-{scenario}-")
+    env = dict(os.environ, SPOTIDOWNLOADER_DATA_DIR=os.path.join(root, "data"))
+    command = [sys.executable, __file__, "--child", scenario, "--spotify-url", spotify_url, "--download-url", download_url,
+               "--output", os.path.join(root, "music"), "--workers", str(args.workers)]
+    if args.use_async:
+        command.append("--async-metadata")
+    try:
+        process = subprocess.run(command, env=env, capture_output=True, text=True)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    lines = process.stdout.strip().splitlines()
+    if process.returncode or not lines:
+        return {"error": (process.stderr.strip().splitlines() or ["no output"])[-1]}
+    return json.loads(lines[-1])
+
+def format_row(scenario, result, calls):
+    if "error" in result:
+        return f"{scenario:<12} error: {result['error']}"
+
+    elapsed = result["fetch_time"] + result["download_time"]
+    tracks_per_minute = result["tracks"] / elapsed * 60 if elapsed else 0
+    mb_per_second = result["bytes"] / 1048576 / result["download_time"] if result["download_time"] else 0
+    peak_rss = f"{result['peak_rss']:.0f}" if result["peak_rss"] is not None else "n/a"
+    api_calls = sum(calls.get(name, 0) for name in spotify_calls)
+    return (f"{scenario:<12}{result['tracks']:>7}{result['fetch_time']:>9.2f}{result['download_time']:>10.2f}"
+            f"{tracks_per_minute:>11.0f}{mb_per_second:>8.2f}{peak_rss:>9}{api_calls:>7}{calls.get('throttled', 0):>6}"
+            f"{calls.get('download', 0) + calls.get('download_errors', 0):>7}{calls.get('audio_truncated', 0):>6}"
+            f"{result['failed']:>7}{result['dead_letters']:>6}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch metadata and download whole scenarios against local stand-in servers")
+    parser.add_argument("--scenarios", nargs="+", choices=list(scenarios), default=list(scenarios))
+    parser.add_argument("--latency", type=float, default=20, help="server latency per request in ms")
+    parser.add_argument("--bandwidth", type=float, default=0, help="per-connection bandwidth in MB/s (0 = unlimited)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of API calls answered with 429 / 503")
+    parser.add_argument("--retry-after", type=int, default=0, help="Retry-After seconds sent with 429 responses")
+    parser.add_argument("--truncate-rate", type=float, default=0.0,
+                        help="fraction of audio transfers cut off halfway; these should resume on retry, not fail")
+    parser.add_argument("--audio-size", type=int, default=200, help="audio size per track in KB")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--async-metadata", dest="use_async", action="store_true", help="use the asyncio metadata backend")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--child", choices=list(scenarios), help=argparse.SUPPRESS)
+    parser.add_argument("--spotify-url", help=argparse.SUPPRESS)
+    parser.add_argument("--download-url", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_scenario(args)), flush=True)
+        return
+
+    latency = args.latency / 1000
+    bandwidth = args.bandwidth * 1048576
+    download_server = start_download_stub(args.audio_size * 1024, latency, bandwidth, args.error_rate, args.truncate_rate)
+    spotify_server = start_spotify_stub(download_server.url, latency, 0, args.error_rate, args.retry_after)
+
+    print(f"latency {args.latency:.0f}ms, bandwidth {args.bandwidth or 'unlimited'} MB/s, error rate {args.error_rate:.0%}, "
+          f"truncate rate {args.truncate_rate:.0%}, "
+          f"audio {args.audio_size}KB, {args.workers} workers, {'async' if args.use_async else 'sync'} metadata")
+    print(f"{'Scenario':<12}{'Tracks':>7}{'Fetch s':>9}{'Download s':>10}{'Tracks/min':>11}{'MB/s':>8}"
+          f"{'RSS MB':>9}{'API':>7}{'429s':>6}{'/dl':>7}{'Cut':>6}{'Failed':>7}{'Dead':>6}")
+
+    results = {}
+    try:
+        for scenario in args.scenarios:
+            result = run_child(args, scenario, spotify_server.url, download_server.url)
+            result["calls"] = {**spotify_server.take_counts(), **download_server.take_counts()}
+            results[scenario] = result
+            print(format_row(scenario, result, result["calls"]), flush=True)
+    finally:
+        spotify_server.shutdown()
+        download_server.shutdown()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"options": {key: value for key, value in vars(args).items() if key not in ("child", "spotify_url", "download_url", "output", "json")},
+                       "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
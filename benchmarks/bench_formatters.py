@@ -0,0 +1,161 @@
+import sys
+import json
+import time
+import timeit
+import argparse
+import platform
+import subprocess
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from stub_servers import SpotifyCatalog
+from getMetadata import parse_uri, format_album_data, format_playlist_data, format_artist_discography_data
+
+default_baseline = Path(__file__).resolve().parent / "baselines" / "formatters.json"
+tracks_per_album = 10
+
+catalog = SpotifyCatalog("https://api.spotify.com", "https://i.scdn.co")
+
+def make_playlist(size):
+    playlist = catalog.playlist(f"p{size}")
+    playlist["tracks"] = catalog.playlist_tracks(f"p{size}", 0, size)
+    return playlist
+
+def make_album(size):
+    album_id = f"a{size}x1"
+    album = catalog.album(album_id)
+    album["tracks"] = catalog.album_tracks(album_id, 0, size)
+    album["_full_tracks"] = {track["id"]: catalog.full_track(track["id"]) for track in album["tracks"]["items"]}
+    return album
+
+def make_discography(size):
+    artist_id = f"r{max(1, size // tracks_per_album)}x{tracks_per_album}"
+    albums = catalog.artist_albums(artist_id, 0, size)["items"]
+    album_tracks = {album["id"]: catalog.album_tracks(album["id"], 0, tracks_per_album)["items"] for album in albums}
+    return {
+        "artist_info": catalog.artist_info(artist_id),
+        "albums": albums,
+        "discography_type": "all",
+        "_album_tracks": album_tracks,
+        "_full_tracks": {track["id"]: catalog.full_track(track["id"]) for tracks in album_tracks.values() for track in tracks}
+    }
+
+uri_templates = [
+    "https://open.spotify.com/track/{}",
+    "https://open.spotify.com/intl-de/album/{}?si=abc123",
+    "https://open.spotify.com/playlist/{}",
+    "https://open.spotify.com/embed/track/{}",
+    "spotify:album:{}",
+    "https://open.spotify.com/user/bench/playlist/{}",
+    "https://open.spotify.com/artist/{}/discography/album",
+    "https://embed.spotify.com/?uri=spotify:track:{}",
+]
+
+def make_uris(size):
+    return [uri_templates[i % len(uri_templates)].format(f"4uLU6hMCjMI75M1A2tKU{i:02d}") for i in range(size)]
+
+def parse_uris(uris):
+    return [parse_uri(uri) for uri in uris]
+
+cases = {
+    "format_playlist_data": (make_playlist, format_playlist_data, False),
+    "format_album_data": (make_album, format_album_data, False),
+    "format_artist_discography_data": (make_discography, format_artist_discography_data, False),
+    "parse_uri": (make_uris, parse_uris, True),
+}
+
+def measure_time(function, payload, repeat):
+    timer = timeit.Timer(lambda: function(payload))
+    loops, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=loops)) / loops
+
+def measure_memory(function, payload):
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+        result = function(payload)
+        peak = tracemalloc.get_traced_memory()[1] - start
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    del result
+    return peak, blocks
+
+def run_case(name, size, repeat):
+    make_payload, function, per_item = cases[name]
+    payload = make_payload(size)
+    seconds = measure_time(function, payload, repeat)
+    peak, blocks = measure_memory(function, payload)
+    calls = size if per_item else 1
+    return {
+        "size": size,
+        "us_per_call": seconds / calls * 1e6,
+        "peak_kb_per_call": peak / calls / 1024,
+        "blocks_per_call": blocks / calls
+    }
+
+def get_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent).stdout.strip()
+    except OSError:
+        return ""
+
+def load_baseline(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def format_delta(value, baseline_value):
+    if not baseline_value:
+        return ""
+    return f"{(value - baseline_value) / baseline_value:+7.1%}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Time and trace allocations of the getMetadata formatters and parse_uri "
+                                                 "on synthetic payloads, compared against a stored baseline")
+    parser.add_argument("--cases", nargs="+", choices=list(cases), default=list(cases))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", default=str(default_baseline), help="baseline file to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="overwrite the baseline file with this run")
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    baseline_results = baseline["results"] if baseline and not args.save_baseline else {}
+    if baseline_results:
+        print(f"Comparing against {args.baseline} ({baseline.get('commit') or 'unknown commit'}, "
+              f"Python {baseline.get('python')}, {baseline.get('platform')})")
+
+    print(f"{'Case':<32}{'Size':>7}{'us/call':>12}{'vs base':>9}{'KB/call':>10}{'vs base':>9}{'Blocks':>10}")
+    results = {}
+    for name in args.cases:
+        for size in args.sizes:
+            key = f"{name}[{size}]"
+            result = run_case(name, size, args.repeat)
+            results[key] = result
+            previous = baseline_results.get(key, {})
+            print(f"{name:<32}{size:>7}{result['us_per_call']:>12.2f}"
+                  f"{format_delta(result['us_per_call'], previous.get('us_per_call')):>9}"
+                  f"{result['peak_kb_per_call']:>10.2f}"
+                  f"{format_delta(result['peak_kb_per_call'], previous.get('peak_kb_per_call')):>9}"
+                  f"{result['blocks_per_call']:>10.1f}", flush=True)
+
+    if args.save_baseline:
+        path = Path(args.baseline)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"created": time.strftime("%Y-%m-%d %H:%M:%S"), "commit": get_commit(),
+                       "python": platform.python_version(), "platform": platform.platform(),
+                       "results": results}, f, indent=2)
+        print(f"Baseline saved to {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import sys
+import time
+import socket
+import json
+import argparse
+import threading
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import httpSession
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    body = json.dumps({"id": "stub", "items": [], "next": None}).encode()
+
+    def setup(self):
+        super().setup()
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def run(label, get, url, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        response = get(url, timeout=10)
+        response.json()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<20} {count} requests in {elapsed:.3f}s -> {count / elapsed:,.0f} req/s")
+    return count / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare module-level requests calls with pooled httpSession calls")
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    server = start_stub_server()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/tracks/stub"
+
+    try:
+        before = run("requests.get", requests.get, url, args.requests)
+        after = run("httpSession.get", httpSession.get, url, args.requests)
+        print(f"speedup: {after / before:.2f}x")
+    finally:
+        httpSession.close_all()
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
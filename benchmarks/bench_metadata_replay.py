@@ -0,0 +1,82 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def run_once(url, data_type, use_async):
+    if use_async:
+        from getMetadataAsync import get_raw_spotify_data
+    else:
+        from getMetadata import get_raw_spotify_data
+    from getMetadata import process_spotify_data
+
+    started_at = time.perf_counter()
+    raw_data = get_raw_spotify_data(url)
+    fetch_time = time.perf_counter() - started_at
+    if "error" in raw_data:
+        raise SystemExit(f"Replay failed: {raw_data['error']}")
+
+    started_at = time.perf_counter()
+    filtered_data = process_spotify_data(raw_data, data_type)
+    format_time = time.perf_counter() - started_at
+    if "error" in filtered_data:
+        raise SystemExit(f"Formatting failed: {filtered_data['error']}")
+
+    digest = hashlib.sha256(json.dumps(filtered_data, sort_keys=True).encode()).hexdigest()[:16]
+    return fetch_time, format_time, len(filtered_data.get("track_list", [])), digest
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the metadata fetch + format path against a recorded fixture "
+                                                 "(record one with: cli.py fetch URL --record FILE.json.gz)")
+    parser.add_argument("fixture", help="fixture file recorded with cli.py fetch --record")
+    parser.add_argument("url", help="the Spotify URL the fixture was recorded for")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0, help="simulated latency per replayed request in ms")
+    parser.add_argument("--async-metadata", dest="use_async", action="store_true", help="use the asyncio metadata backend")
+    parser.add_argument("--profile", action="store_true", help="print the top functions by cumulative time for one run")
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="spotidownloader-replay-")
+    os.environ["SPOTIDOWNLOADER_DATA_DIR"] = data_dir
+
+    from getMetadata import parse_uri
+    from httpFixtures import use_fixtures
+
+    data_type = parse_uri(args.url)["type"]
+
+    try:
+        with use_fixtures(args.fixture, "replay", args.latency / 1000) as fixtures:
+            runs = []
+            for _ in range(args.repeat):
+                fixtures.rewind()
+                runs.append(run_once(args.url, data_type, args.use_async))
+
+            if args.profile:
+                import cProfile
+                import pstats
+                fixtures.rewind()
+                profiler = cProfile.Profile()
+                profiler.runcall(run_once, args.url, data_type, args.use_async)
+                pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    fetch_times = [run[0] for run in runs]
+    format_times = [run[1] for run in runs]
+    digests = {run[3] for run in runs}
+    print(f"{runs[0][2]} tracks, {fixtures.requests} recorded requests, {args.repeat} runs, "
+          f"{args.latency:.0f}ms latency, {'async' if args.use_async else 'sync'} metadata")
+    print(f"fetch   min {min(fetch_times) * 1000:8.1f}ms  median {statistics.median(fetch_times) * 1000:8.1f}ms")
+    print(f"format  min {min(format_times) * 1000:8.1f}ms  median {statistics.median(format_times) * 1000:8.1f}ms")
+    print(f"output digest {', '.join(sorted(digests))}" + ("" if len(digests) == 1 else "  (runs differ!)"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+import re
+import json
+import time
+import socket
+import random
+import hashlib
+import threading
+from collections import Counter
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+spotify_api_url = "https://api.spotify.com"
+mp3_frame = b'\xff\xfb\x90\x64' + b'\x00' * 413
+cover_image = b'\xff\xd8\xff\xe0' + b'\x00' * 2048
+write_chunk_size = 64 * 1024
+audio_etag = '"stub-audio"'
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, handler, latency=0.0, bandwidth=0, error_rate=0.0, seed=0, truncate_rate=0.0):
+        super().__init__(("127.0.0.1", 0), handler)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.truncate_rate = truncate_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = Counter()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def count(self, name):
+        with self.lock:
+            self.calls[name] += 1
+
+    def should_fail(self):
+        with self.lock:
+            return self.error_rate > 0 and self.random.random() < self.error_rate
+
+    def should_truncate(self):
+        with self.lock:
+            return self.truncate_rate > 0 and self.random.random() < self.truncate_rate
+
+    def take_counts(self):
+        with self.lock:
+            counts, self.calls = dict(self.calls), Counter()
+        return counts
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def send_body(self, status, body, content_type="application/json", headers=None, truncate=False):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+
+        bandwidth = self.server.bandwidth
+        # A truncated body stops halfway and drops the connection, like a broken transfer
+        end = len(body) // 2 if truncate else len(body)
+        for offset in range(0, end, write_chunk_size):
+            chunk = body[offset:min(offset + write_chunk_size, end)]
+            self.wfile.write(chunk)
+            if bandwidth:
+                time.sleep(len(chunk) / bandwidth)
+        if truncate:
+            self.close_connection = True
+
+    def send_json(self, data, status=200, headers=None):
+        self.send_body(status, json.dumps(data).encode(), headers=headers)
+
+    def log_message(self, format, *args):
+        pass
+
+def get_isrc(track_id):
+    return "QZ" + hashlib.md5(track_id.encode()).hexdigest()[:10].upper()
+
+def parse_album_id(album_id):
+    match = re.fullmatch(r"a(\d+)x(\d+)", album_id)
+    return int(match.group(1)) if match else 0
+
+def make_page(base_url, offset, limit, total, make_item):
+    end = min(offset + limit, total)
+    return {
+        "href": f"{base_url}?offset={offset}&limit={limit}",
+        "items": [make_item(index) for index in range(offset, end)],
+        "limit": limit,
+        "next": f"{base_url}?offset={end}&limit={limit}" if end < total else None,
+        "offset": offset,
+        "previous": None,
+        "total": total
+    }
+
+class SpotifyCatalog:
+    artist = {"name": "Bench Artist", "id": "benchartist"}
+
+    def __init__(self, api_url, image_url):
+        self.api_url = api_url
+        self.image_url = image_url
+
+    def album_images(self, album_id):
+        return [{"url": f"{self.image_url}/cover/{album_id}.jpg", "height": 640, "width": 640}]
+
+    def simple_track(self, album_id, index):
+        track_id = f"{album_id}t{index}"
+        return {
+            "id": track_id,
+            "uri": f"spotify:track:{track_id}",
+            "name": f"Track {index + 1} ({album_id})",
+            "artists": [self.artist],
+            "duration_ms": 180000 + index * 1000,
+            "track_number": index + 1,
+            "disc_number": 1
+        }
+
+    def full_track(self, track_id):
+        album_id, index = track_id.rsplit("t", 1)
+        track = self.simple_track(album_id, int(index))
+        track["album"] = {
+            "id": album_id,
+            "name": f"Album {album_id}",
+            "album_type": "album",
+            "release_date": "2024-01-01",
+            "artists": [self.artist],
+            "images": self.album_images(album_id)
+        }
+        track["external_ids"] = {"isrc": get_isrc(track_id)}
+        return track
+
+    def album(self, album_id, with_tracks=True):
+        total = parse_album_id(album_id)
+        album = {
+            "id": album_id,
+            "uri": f"spotify:album:{album_id}",
+            "name": f"Album {album_id}",
+            "album_type": "album",
+            "release_date": "2024-01-01",
+            "total_tracks": total,
+            "artists": [self.artist],
+            "images": self.album_images(album_id)
+        }
+        if with_tracks:
+            album["tracks"] = self.album_tracks(album_id, 0, 50)
+        return album
+
+    def album_tracks(self, album_id, offset, limit):
+        return make_page(f"{self.api_url}/v1/albums/{album_id}/tracks", offset, limit, parse_album_id(album_id),
+                         lambda index: self.simple_track(album_id, index))
+
+    def playlist_item(self, index):
+        return {"added_at": "2024-01-01T00:00:00Z", "track": self.full_track(f"a1x{100000 + index}t0")}
+
+    def playlist(self, playlist_id):
+        return {
+            "id": playlist_id,
+            "uri": f"spotify:playlist:{playlist_id}",
+            "name": f"Bench Playlist {playlist_id}",
+            "snapshot_id": "bench",
+            "owner": {"id": "bench", "uri": "spotify:user:bench", "display_name": "Bench"},
+            "followers": {"total": 0},
+            "images": self.album_images(playlist_id),
+            "tracks": self.playlist_tracks(playlist_id, 0, 100)
+        }
+
+    def playlist_tracks(self, playlist_id, offset, limit):
+        return make_page(f"{self.api_url}/v1/playlists/{playlist_id}/tracks", offset, limit,
+                         int(playlist_id[1:]), self.playlist_item)
+
+    def artist_info(self, artist_id):
+        return {"id": artist_id, "uri": f"spotify:artist:{artist_id}", "name": "Bench Artist",
+                "followers": {"total": 0}, "genres": [], "images": []}
+
+    def artist_albums(self, artist_id, offset, limit):
+        album_count, tracks_per_album = (int(value) for value in artist_id[1:].split("x"))
+        return make_page(f"{self.api_url}/v1/artists/{artist_id}/albums", offset, limit, album_count,
+                         lambda index: self.album(f"a{tracks_per_album}x{index + 1}", with_tracks=False))
+
+class SpotifyStubHandler(StubHandler):
+    routes = [
+        ("playlist", re.compile(r"/v1/playlists/(p\d+)")),
+        ("playlist_tracks", re.compile(r"/v1/playlists/(p\d+)/tracks")),
+        ("album", re.compile(r"/v1/albums/(a\d+x\d+)")),
+        ("album_tracks", re.compile(r"/v1/albums/(a\d+x\d+)/tracks")),
+        ("albums", re.compile(r"/v1/albums")),
+        ("track", re.compile(r"/v1/tracks/([\w]+)")),
+        ("tracks", re.compile(r"/v1/tracks")),
+        ("artist", re.compile(r"/v1/artists/(r\d+x\d+)")),
+        ("artist_albums", re.compile(r"/v1/artists/(r\d+x\d+)/albums")),
+    ]
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+
+        if url.path == "/api/token":
+            self.server.count("token")
+            self.send_json({"accessToken": "bench-token", "accessTokenExpirationTimestampMs": int(time.time() * 1000) + 3600000})
+            return
+
+        if self.server.should_fail():
+            self.server.count("throttled")
+            self.send_json({"error": {"status": 429}}, 429, {"Retry-After": str(self.server.retry_after)})
+            return
+
+        for name, pattern in self.routes:
+            match = pattern.fullmatch(url.path)
+            if match:
+                self.server.count(name)
+                data = self.route(name, match.groups(), query)
+                break
+        else:
+            self.server.count("not_found")
+            self.send_json({"error": {"status": 404}}, 404)
+            return
+
+        body = json.dumps(data).encode()
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_body(304, b"", headers={"ETag": etag})
+        else:
+            self.send_body(200, body, headers={"ETag": etag})
+
+    def route(self, name, groups, query):
+        catalog = self.server.catalog
+        offset = int(query.get("offset", ["0"])[0])
+        limit = int(query.get("limit", ["20"])[0])
+        ids = query.get("ids", [""])[0].split(",")
+
+        if name == "playlist":
+            return catalog.playlist(groups[0])
+        if name == "playlist_tracks":
+            return catalog.playlist_tracks(groups[0], offset, limit)
+        if name == "album":
+            return catalog.album(groups[0])
+        if name == "album_tracks":
+            return catalog.album_tracks(groups[0], offset, limit)
+        if name == "albums":
+            return {"albums": [catalog.album(album_id) for album_id in ids]}
+        if name == "track":
+            return catalog.full_track(groups[0])
+        if name == "tracks":
+            return {"tracks": [catalog.full_track(track_id) for track_id in ids]}
+        if name == "artist":
+            return catalog.artist_info(groups[0])
+        return catalog.artist_albums(groups[0], offset, limit)
+
+class DownloadStubHandler(StubHandler):
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        track_id = json.loads(self.rfile.read(length) or b"{}").get("id", "")
+        time.sleep(self.server.latency)
+
+        if self.server.should_fail():
+            self.server.count("download_errors")
+            self.send_json({"success": False, "error": "Service unavailable"}, 503)
+            return
+
+        self.server.count("download")
+        self.send_json({"success": True, "link": f"{self.server.url}/audio/{track_id}.mp3"})
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        if self.path.startswith("/audio/"):
+            self.send_audio()
+        elif self.path.startswith("/cover/"):
+            self.server.count("cover")
+            self.send_body(200, cover_image, "image/jpeg")
+        else:
+            self.server.count("not_found")
+            self.send_body(404, b"")
+
+    def send_audio(self):
+        audio = self.server.audio
+        match = re.match(r"bytes=(\d+)-", self.headers.get("Range", ""))
+        if match and self.headers.get("If-Range", audio_etag) == audio_etag and int(match.group(1)) < len(audio):
+            start = int(match.group(1))
+            status, headers = 206, {"Content-Range": f"bytes {start}-{len(audio) - 1}/{len(audio)}"}
+            self.server.count("audio_resumed")
+        else:
+            start, status, headers = 0, 200, {}
+            self.server.count("audio")
+
+        truncate = self.server.should_truncate()
+        if truncate:
+            self.server.count("audio_truncated")
+        self.send_body(status, audio[start:], "audio/mpeg", {"ETag": audio_etag, **headers}, truncate)
+
+def start_spotify_stub(image_url, latency=0.0, bandwidth=0, error_rate=0.0, retry_after=0):
+    server = StubServer(SpotifyStubHandler, latency, bandwidth, error_rate)
+    server.catalog = SpotifyCatalog(server.url, image_url)
+    server.retry_after = retry_after
+    return server.start()
+
+def start_download_stub(audio_size, latency=0.0, bandwidth=0, error_rate=0.0, truncate_rate=0.0):
+    server = StubServer(DownloadStubHandler, latency, bandwidth, error_rate, truncate_rate=truncate_rate)
+    server.audio = mp3_frame * max(1, audio_size // len(mp3_frame))
+    return server.start()
+
+def point_at_stubs(spotify_url, download_url):
+    import pyotp
+    import getMetadata
+    import downloadEngine
+
+    for name, value in list(vars(getMetadata).items()):
+        if isinstance(value, str) and value.startswith(spotify_api_url):
+            setattr(getMetadata, name, spotify_url + value[len(spotify_api_url):])
+
+    getMetadata.token_url = f"{spotify_url}/api/token"
+    getMetadata.generate_totp = lambda: (pyotp.TOTP(pyotp.random_base32()), int(time.time()), 0)
+    downloadEngine.download_api_url = f"{download_url}/download"
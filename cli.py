@@ -0,0 +1,228 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from dataclasses import asdict
+from functools import partial
+
+from getMetadata import get_filtered_data, parse_uri, SpotifyInvalidUrlException
+from downloadEngine import Track, DownloadEngine, get_download_plan, get_job_outpath
+from retryScheduler import dead_letter_queue
+from tracing import tracer
+import httpSession
+from httpFixtures import use_fixtures
+from playlistSync import get_pending_sync, commit_playlist_sync
+
+exit_ok = 0
+exit_track_failures = 1
+exit_fetch_failed = 3
+emit_lock = threading.Lock()
+
+def emit(event, **fields):
+    line = json.dumps({"event": event, "time": round(time.time(), 3), **fields}, ensure_ascii=False)
+    with emit_lock:
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+def read_urls(args):
+    urls = list(args.urls)
+    if args.input == "-":
+        urls.extend(line.strip() for line in sys.stdin)
+    elif args.input:
+        with open(args.input, "r", encoding="utf-8") as f:
+            urls.extend(line.strip() for line in f)
+    return [url for url in urls if url and not url.startswith("#")]
+
+def fetch_metadata(url, sync=False, use_async=False):
+    try:
+        url_info = parse_uri(url)
+        if use_async:
+            from getMetadataAsync import get_filtered_data as get_filtered_data_async
+            metadata = get_filtered_data_async(url, sync=sync)
+        else:
+            metadata = get_filtered_data(url, sync=sync)
+    except SpotifyInvalidUrlException as e:
+        emit("error", url=url, message=str(e))
+        return None, None
+    except Exception as e:
+        emit("error", url=url, message=f"Failed to fetch metadata: {str(e)}")
+        return None, None
+
+    if "error" in metadata:
+        emit("error", url=url, message=metadata["error"])
+        return None, None
+    return metadata, url_info
+
+def emit_track_event(url, event, track=None, **fields):
+    if event in ("track_started", "track_finished", "track_retry"):
+        emit(event, url=url, id=track.id, title=track.title, artists=track.artists, **fields)
+
+def run_download(args, url, tracks, context, outpath, pending_sync=None):
+    os.makedirs(outpath, exist_ok=True)
+
+    result = {}
+    engine = DownloadEngine(
+        tracks, outpath, args.token,
+        context["is_single_track"], context["is_album"], context["is_playlist"], context["album_or_playlist_name"],
+        args.filename_format, args.track_numbers, args.artist_subfolders, args.album_subfolders,
+        args.workers, args.existing, args.output,
+        progress=lambda message, percentage: emit("progress", url=url, message=message, percent=percentage),
+        finished=lambda success, message, failed, successful, skipped: result.update(
+            success=success, message=message, failed=failed, successful=successful, skipped=skipped),
+        on_event=partial(emit_track_event, url)
+    )
+    try:
+        engine.run()
+    except KeyboardInterrupt:
+        engine.stop()
+        raise
+
+    commit_playlist_sync(pending_sync, [track.id for track in result.get("successful", []) + result.get("skipped", [])])
+    failed = [{"title": title, "artists": artists, "error": error} for title, artists, error in result.get("failed", [])]
+    emit("finished", url=url, success=result.get("success", False), message=result.get("message", ""),
+         downloaded=len(result.get("successful", [])), skipped=len(result.get("skipped", [])), failed=failed)
+    return result.get("success", False) and not failed
+
+def cmd_fetch(args):
+    if args.record or args.replay:
+        mode, path = ("record", args.record) if args.record else ("replay", args.replay)
+        with use_fixtures(path, mode, args.replay_latency / 1000) as fixtures:
+            exit_code = fetch_urls(args)
+        emit("fixtures", mode=mode, path=path, requests=fixtures.requests)
+        return exit_code
+    return fetch_urls(args)
+
+def fetch_urls(args):
+    exit_code = exit_ok
+    for url in args.urls:
+        metadata, url_info = fetch_metadata(url, args.sync, args.use_async)
+        if metadata is None:
+            exit_code = exit_fetch_failed
+            continue
+
+        tracks, context = get_download_plan(metadata, url_info["type"])
+        fields = {"url": url, "type": url_info["type"], "tracks": len(tracks)}
+        if context:
+            fields["name"] = context["album_or_playlist_name"]
+        if args.tracks:
+            fields["track_list"] = [asdict(track) for track in tracks]
+        emit("metadata", **fields)
+    return exit_code
+
+def cmd_download(args):
+    exit_code = exit_ok
+    for url in args.urls:
+        metadata, url_info = fetch_metadata(url, args.sync, args.use_async)
+        if metadata is None:
+            exit_code = exit_fetch_failed
+            continue
+
+        tracks, context = get_download_plan(metadata, url_info["type"])
+        if not tracks:
+            commit_playlist_sync(get_pending_sync(metadata), [])
+            emit("finished", url=url, success=True, message="No tracks to download", downloaded=0, skipped=0, failed=[])
+            continue
+
+        outpath = get_job_outpath(args.output, context)
+        emit("started", url=url, type=url_info["type"], name=context["album_or_playlist_name"], tracks=len(tracks), outpath=outpath)
+        if not run_download(args, url, tracks, context, outpath, get_pending_sync(metadata)) and exit_code == exit_ok:
+            exit_code = exit_track_failures
+    return exit_code
+
+def cmd_retry_failed(args):
+    exit_code = exit_ok
+    for context, tracks in dead_letter_queue.groups():
+        outpath = context["outpath"]
+        emit("started", url=None, type="retry", name=context["album_or_playlist_name"], tracks=len(tracks), outpath=outpath)
+        if not run_download(args, None, [Track(**track) for track in tracks], context, outpath):
+            exit_code = exit_track_failures
+    return exit_code
+
+def add_url_arguments(parser):
+    parser.add_argument("urls", nargs="*", help="Spotify URLs")
+    parser.add_argument("-i", "--input", help="read URLs from a file, one per line ('-' for stdin)")
+    parser.add_argument("--async-metadata", dest="use_async", action="store_true", help="use the asyncio metadata backend")
+
+def add_http_arguments(parser):
+    parser.add_argument("--pool-size", type=int, help=f"connections kept per host (default: {httpSession.pool_maxsize})")
+    parser.add_argument("--timeout", type=float, help=f"HTTP timeout in seconds (default: {httpSession.default_timeout})")
+    parser.add_argument("--http2", action="store_true", help="negotiate HTTP/2 where supported (needs the h2 package)")
+
+def add_download_arguments(parser):
+    parser.add_argument("-o", "--output", default=os.path.join(os.path.expanduser("~"), "Music"), help="output directory")
+    parser.add_argument("-t", "--token", default=os.environ.get("SPOTIDOWNLOADER_TOKEN", ""),
+                        help="spotidownloader.com token (default: $SPOTIDOWNLOADER_TOKEN)")
+    parser.add_argument("-w", "--workers", type=int, default=2, help="concurrent downloads")
+    parser.add_argument("--filename-format", choices=["title_artist", "artist_title", "title_only"], default="title_artist")
+    parser.add_argument("--track-numbers", action="store_true", help="prefix album and playlist files with the track number")
+    parser.add_argument("--artist-subfolders", action="store_true", help="playlist tracks go into artist folders")
+    parser.add_argument("--album-subfolders", action="store_true", help="playlist tracks go into album folders")
+    parser.add_argument("--existing", choices=["skip", "link", "move"], default="skip",
+                        help="what to do with tracks already elsewhere under the output directory")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Headless SpotiDownloader. Progress is written to stdout as JSON lines.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    fetch_parser = subparsers.add_parser("fetch", help="fetch metadata only")
+    add_url_arguments(fetch_parser)
+    fetch_parser.add_argument("--tracks", action="store_true", help="include the full track list")
+    fetch_parser.add_argument("--sync", action="store_true", help="only list playlist tracks added since the last sync")
+    fixture_group = fetch_parser.add_mutually_exclusive_group()
+    fixture_group.add_argument("--record", metavar="FILE", help="record every metadata request and response to a fixture file (.json or .json.gz)")
+    fixture_group.add_argument("--replay", metavar="FILE", help="serve metadata requests from a recorded fixture file instead of the network")
+    fetch_parser.add_argument("--replay-latency", type=float, default=0, help="simulated latency per replayed request in ms")
+    add_http_arguments(fetch_parser)
+    fetch_parser.set_defaults(handler=cmd_fetch)
+
+    download_parser = subparsers.add_parser("download", help="fetch metadata and download tracks")
+    add_url_arguments(download_parser)
+    add_download_arguments(download_parser)
+    add_http_arguments(download_parser)
+    download_parser.set_defaults(handler=cmd_download, sync=False)
+
+    sync_parser = subparsers.add_parser("sync", help="download only tracks added to playlists since the last sync")
+    add_url_arguments(sync_parser)
+    add_download_arguments(sync_parser)
+    add_http_arguments(sync_parser)
+    sync_parser.set_defaults(handler=cmd_download, sync=True)
+
+    retry_parser = subparsers.add_parser("retry-failed", help="re-submit tracks from the failed downloads list")
+    add_download_arguments(retry_parser)
+    add_http_arguments(retry_parser)
+    retry_parser.set_defaults(handler=cmd_retry_failed)
+
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command != "fetch" and not args.token:
+        parser.error("a token is required (--token or $SPOTIDOWNLOADER_TOKEN)")
+    if hasattr(args, "urls") and not args.urls and not args.input:
+        parser.error("no URLs given")
+    if hasattr(args, "urls"):
+        try:
+            args.urls = read_urls(args)
+        except (OSError, UnicodeDecodeError) as e:
+            parser.error(f"cannot read URLs from {args.input}: {e}")
+
+    if not httpSession.configure(args.pool_size, args.timeout, args.http2) and args.http2:
+        emit("error", message="HTTP/2 needs the h2 package (pip install h2), continuing with HTTP/1.1")
+
+    tracer.start_run(args.command)
+    try:
+        return args.handler(args)
+    except KeyboardInterrupt:
+        emit("error", message="Interrupted")
+        return exit_track_failures
+    finally:
+        summary = tracer.end_run()
+        if summary:
+            emit("trace", **summary)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+import httpSession
+from appData import get_data_dir
+from tracing import tracer
+
+image_headers = {
+    'Referer': 'https://spotidownloader.com/',
+    'Origin': 'https://spotidownloader.com'
+}
+
+class CoverCache:
+    def __init__(self, directory=None, max_items=64):
+        self.directory = directory
+        self.max_items = max_items
+        self.memory = OrderedDict()
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "fetches": 0, "coalesced": 0}
+
+    def get_directory(self):
+        if self.directory is None:
+            self.directory = get_data_dir() / "covers"
+        (self.directory / "urls").mkdir(parents=True, exist_ok=True)
+        return self.directory
+
+    def get_url_path(self, url):
+        return self.get_directory() / "urls" / hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def remember(self, url, data):
+        with self.lock:
+            self.memory[url] = data
+            self.memory.move_to_end(url)
+            while len(self.memory) > self.max_items:
+                self.memory.popitem(last=False)
+
+    def read_disk(self, url):
+        try:
+            url_path = self.get_url_path(url)
+            if not url_path.exists():
+                return None
+            content_hash = url_path.read_text().strip()
+            return (self.get_directory() / f"{content_hash}.jpg").read_bytes()
+        except OSError:
+            return None
+
+    def write_disk(self, url, data):
+        try:
+            content_hash = hashlib.sha256(data).hexdigest()
+            blob_path = self.get_directory() / f"{content_hash}.jpg"
+            if not blob_path.exists():
+                temp_path = blob_path.with_name(blob_path.name + f".{threading.get_ident()}.tmp")
+                temp_path.write_bytes(data)
+                temp_path.replace(blob_path)
+
+            url_path = self.get_url_path(url)
+            temp_path = url_path.with_name(url_path.name + f".{threading.get_ident()}.tmp")
+            temp_path.write_text(content_hash)
+            temp_path.replace(url_path)
+        except OSError as e:
+            print(f"Error caching cover art: {e}", file=sys.stderr)
+
+    def fetch(self, url):
+        with tracer.span("cover_fetch") as span:
+            response = httpSession.get(url, headers=image_headers, timeout=30)
+            span["status"] = response.status_code
+            span["bytes"] = len(response.content)
+        if response.status_code != 200:
+            raise Exception(f"Failed to download cover art. Status code: {response.status_code}")
+        return response.content
+
+    def get(self, url):
+        with self.lock:
+            data = self.memory.get(url)
+            if data is not None:
+                self.memory.move_to_end(url)
+                self.stats["memory_hits"] += 1
+                return data
+
+            future = self.pending.get(url)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                owner = False
+            else:
+                future = Future()
+                self.pending[url] = future
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            data = self.read_disk(url)
+            if data is not None:
+                with self.lock:
+                    self.stats["disk_hits"] += 1
+            else:
+                data = self.fetch(url)
+                with self.lock:
+                    self.stats["fetches"] += 1
+                self.write_disk(url, data)
+
+            self.remember(url, data)
+            future.set_result(data)
+            return data
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                self.pending.pop(url, None)
+
+cover_cache = CoverCache()
@@ -0,0 +1,720 @@
+import os
+import re
+import time
+import shutil
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, asdict
+from functools import partial
+from urllib.parse import urlparse
+import requests
+
+from coverCache import cover_cache
+from downloadPipeline import DownloadPipeline, TrackJob, deferred
+from id3Writer import build_id3_tag, ID3v2Stripper
+from libraryIndex import library_index, probe_file
+from partialDownload import (
+    load_partial, save_partial, discard_partial, get_sidecar_path,
+    new_partial_state, get_range_headers, is_matching_range
+)
+from retryScheduler import classify_error, retry_limits, backoff_delay, dead_letter_queue
+from tracing import tracer, format_summary
+import httpSession
+
+download_api_url = "https://api.spotidownloader.com/download"
+expired_link_statuses = (403, 410)
+
+@dataclass
+class Track:
+    id: str
+    title: str
+    artists: str
+    album: str
+    track_number: int
+    duration_ms: int
+    isrc: str = ""
+    image_url: str = ""
+    release_date: str = ""
+
+def make_track(track, album=None, track_number=None):
+    return Track(
+        id=track.get("id", ""),
+        title=track["name"],
+        artists=track["artists"],
+        album=album if album is not None else track["album_name"],
+        track_number=track_number if track_number is not None else track["track_number"],
+        duration_ms=track.get("duration_ms", 0),
+        isrc=track.get("isrc", ""),
+        image_url=track.get("images", ""),
+        release_date=track.get("release_date", "")
+    )
+
+def get_download_plan(metadata, data_type):
+    if data_type == "track":
+        track = make_track(metadata["track"], track_number=1)
+        return [track], {
+            "is_single_track": True, "is_album": False, "is_playlist": False,
+            "album_or_playlist_name": f"{track.title} - {track.artists}"
+        }
+
+    if data_type == "album":
+        name = metadata["album_info"]["name"]
+        tracks = [make_track(track, album=name) for track in metadata["track_list"]]
+        return tracks, {"is_single_track": False, "is_album": True, "is_playlist": False, "album_or_playlist_name": name}
+
+    if data_type == "playlist":
+        name = metadata["playlist_info"]["owner"]["name"]
+    elif data_type == "artist_discography":
+        artist_info = metadata["artist_info"]
+        name = f"{artist_info['name']} - Discography ({artist_info['discography_type'].title()})"
+    else:
+        return [], None
+
+    tracks = []
+    for track in metadata["track_list"]:
+        tracks.append(make_track(track, track_number=track.get("track_number", len(tracks) + 1)))
+    return tracks, {"is_single_track": False, "is_album": False, "is_playlist": True, "album_or_playlist_name": name}
+
+def get_job_outpath(output_root, context):
+    if context["is_album"] or context["is_playlist"]:
+        folder_name = re.sub(r'[<>:"/\\|?*]', '_', context["album_or_playlist_name"])
+        return os.path.join(output_root, folder_name)
+    return output_root
+
+class CancellationToken:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.callbacks = []
+        self.is_cancelled = False
+
+    @property
+    def cancelled(self):
+        return self.is_cancelled
+
+    def add_callback(self, callback):
+        with self.lock:
+            if not self.is_cancelled:
+                self.callbacks.append(callback)
+                return
+        callback()
+
+    def cancel(self):
+        with self.lock:
+            if self.is_cancelled:
+                return
+            self.is_cancelled = True
+            callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+class PauseGate:
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.is_paused = False
+
+    @property
+    def paused(self):
+        return self.is_paused
+
+    def pause(self):
+        with self.condition:
+            self.is_paused = True
+
+    def resume(self):
+        with self.condition:
+            self.is_paused = False
+            self.condition.notify_all()
+
+    def wake(self):
+        with self.condition:
+            self.condition.notify_all()
+
+    def wait(self, cancel_token=None):
+        with self.condition:
+            while self.is_paused and not (cancel_token and cancel_token.cancelled):
+                self.condition.wait()
+        return not (cancel_token and cancel_token.cancelled)
+
+class LinkSlots:
+    def __init__(self, size):
+        self.condition = threading.Condition()
+        self.available = size
+
+    def wake(self):
+        with self.condition:
+            self.condition.notify_all()
+
+    def acquire(self, cancel_token=None):
+        with self.condition:
+            while self.available <= 0 and not (cancel_token and cancel_token.cancelled):
+                self.condition.wait()
+            if cancel_token and cancel_token.cancelled:
+                return False
+            self.available -= 1
+            return True
+
+    def release(self):
+        with self.condition:
+            self.available += 1
+            self.condition.notify()
+
+class TrackClaims:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.claims = {}
+
+    def claim(self, key, owner):
+        with self.lock:
+            claim = self.claims.get(key)
+            if claim is None:
+                self.claims[key] = (owner, Future())
+                return None
+            return claim[1] if claim[0] is not owner else None
+
+    def release(self, key, owner):
+        with self.lock:
+            claim = self.claims.get(key)
+            if claim is None or claim[0] is not owner:
+                return
+            del self.claims[key]
+        claim[1].set_result(None)
+
+class DownloadEngine:
+    chunk_size = 64 * 1024
+    progress_step = 0.25
+    validation_workers = 2
+    tagging_workers = 2
+    links_per_worker = 2
+    
+    def __init__(self, tracks, outpath, token, is_single_track=False, is_album=False, is_playlist=False, 
+                 album_or_playlist_name='', filename_format='title_artist', use_track_numbers=True,
+                 use_artist_subfolders=False, use_album_subfolders=False, max_workers=1, existing_file_action='skip',
+                 library_root=None, progress=None, finished=None, on_event=None, cancel_token=None, pause_gate=None,
+                 download_slots=None, track_claims=None):
+        self.progress = progress or (lambda message, percentage: None)
+        self.finished = finished or (lambda success, message, failed, successful, skipped: None)
+        self.on_event = on_event
+        self.tracks = tracks
+        self.outpath = outpath
+        self.token = token
+        self.is_single_track = is_single_track
+        self.is_album = is_album
+        self.is_playlist = is_playlist
+        self.album_or_playlist_name = album_or_playlist_name
+        self.filename_format = filename_format
+        self.use_track_numbers = use_track_numbers
+        self.use_artist_subfolders = use_artist_subfolders
+        self.use_album_subfolders = use_album_subfolders
+        self.max_workers = max(1, int(max_workers))
+        self.existing_file_action = existing_file_action
+        self.library_root = library_root or outpath
+        self.cancel_token = cancel_token or CancellationToken()
+        self.pause_gate = pause_gate or PauseGate()
+        self.cancel_token.add_callback(self.pause_gate.wake)
+        self.link_slots = LinkSlots(self.max_workers * self.links_per_worker)
+        self.cancel_token.add_callback(self.link_slots.wake)
+        self.download_slots = download_slots
+        self.track_claims = track_claims
+        self.path_claims = TrackClaims()
+        self.failed_tracks = []
+        self.successful_tracks = []
+        self.skipped_tracks = []
+        self.completed_count = 0
+        self.total_tracks = len(tracks)
+        self.lock = threading.Lock()
+        self.pipeline = None
+
+    @property
+    def is_paused(self):
+        return self.pause_gate.paused
+
+    @property
+    def is_stopped(self):
+        return self.cancel_token.cancelled
+
+    def emit(self, event, **fields):
+        if self.on_event:
+            self.on_event(event, **fields)
+
+    def get_formatted_filename(self, track):
+        if self.filename_format == "artist_title":
+            filename = f"{track.artists} - {track.title}.mp3"
+        elif self.filename_format == "title_only":
+            filename = f"{track.title}.mp3"
+        else:
+            filename = f"{track.title} - {track.artists}.mp3"
+        filename = re.sub(r'[<>:"/\\|?*]', lambda m: "'" if m.group() == '"' else '_', filename)
+        return filename
+
+    def get_output_filepath(self, track, create=False):
+        filename = self.get_formatted_filename(track)
+        
+        if self.is_playlist:
+            outpath = self.outpath
+            
+            if self.use_artist_subfolders:
+                artist_name = track.artists.split(', ')[0] if ', ' in track.artists else track.artists
+                artist_folder = re.sub(r'[<>:"/\\|?*]', lambda m: "'" if m.group() == '"' else '_', artist_name)
+                outpath = os.path.join(outpath, artist_folder)
+            
+            if self.use_album_subfolders:
+                album_folder = re.sub(r'[<>:"/\\|?*]', lambda m: "'" if m.group() == '"' else '_', track.album)
+                outpath = os.path.join(outpath, album_folder)
+            
+            if create:
+                os.makedirs(outpath, exist_ok=True)
+        else:
+            outpath = self.outpath
+
+        if (self.is_album or self.is_playlist) and self.use_track_numbers:
+            filename = f"{track.track_number:02d} - {filename}"
+    
+        return os.path.join(outpath, filename)
+
+    def run_stage(self, handler, job):
+        try:
+            result = handler(job)
+        except requests.Timeout:
+            result = (False, "Request timed out - connection took too long")
+        except requests.RequestException as e:
+            result = (False, f"Connection error: {str(e)}")
+        except Exception as e:
+            result = (False, f"Exception occurred: {str(e)}")
+        else:
+            return result
+        
+        if job.temp_filepath and os.path.exists(job.temp_filepath) and not os.path.exists(get_sidecar_path(job.temp_filepath)):
+            try:
+                os.remove(job.temp_filepath)
+            except:
+                pass
+        return result
+
+    def run_limited(self, handler, job):
+        if not self.download_slots:
+            return handler(job)
+        with self.download_slots:
+            return handler(job)
+
+    def run_transfer(self, job):
+        try:
+            return self.run_limited(self.transfer_audio, job)
+        finally:
+            self.release_link_slot(job)
+
+    def release_link_slot(self, job):
+        if job.link_slot:
+            job.link_slot = False
+            self.link_slots.release()
+
+    def resolve_link(self, job):
+        if not self.wait_if_paused():
+            return False, "Download stopped by user"
+        
+        track = job.track
+        if self.track_claims and track.id:
+            pending = self.track_claims.claim(track.id, self)
+            if pending:
+                self.progress(f"Waiting for another job downloading: {track.title} - {track.artists}", 0)
+                self.pipeline.defer(pending, 0, job)
+                return deferred
+        
+        job.filepath = self.get_output_filepath(track, create=True)
+        pending = self.path_claims.claim(job.filepath, job)
+        if pending:
+            self.progress(f"Waiting for duplicate track: {track.title} - {track.artists}", 0)
+            self.pipeline.defer(pending, 0, job)
+            return deferred
+        
+        with self.lock:
+            percentage = int(self.completed_count / self.total_tracks * 100)
+        self.progress(f"Processing ({job.index+1}/{self.total_tracks}): {track.title} - {track.artists}", percentage)
+        self.emit("track_started", index=job.index, track=track, attempt=job.retries + 1)
+
+        existing = library_index.lookup(job.filepath)
+        if existing is None and os.path.exists(job.filepath):
+            existing = probe_file(job.filepath)
+            if existing.valid:
+                library_index.store(job.filepath, existing)
+        if existing and existing.valid:
+            discard_partial(job.filepath + ".tmp")
+            return True, "File already exists - skipped"
+        
+        if existing or os.path.exists(job.filepath):
+            try:
+                os.remove(job.filepath)
+                library_index.remove(job.filepath)
+            except Exception as e:
+                return False, f"Failed to remove corrupted file: {str(e)}"
+        
+        duplicate = library_index.find_track(track.id, track.isrc, self.library_root)
+        if duplicate:
+            discard_partial(job.filepath + ".tmp")
+            return self.reuse_existing_file(duplicate, job.filepath)
+
+        if not self.link_slots.acquire(self.cancel_token):
+            return False, "Download stopped by user"
+        job.link_slot = True
+        job.temp_filepath = job.filepath + ".tmp"
+        job.resume = load_partial(job.temp_filepath)
+        if job.resume:
+            job.link = job.resume["link"]
+        else:
+            result = self.request_download_link(job)
+            if result:
+                return result
+        
+        if track.image_url:
+            try:
+                cover_cache.get(track.image_url)
+            except Exception as e:
+                self.progress(f"Error prefetching cover art: {e}", 0)
+        
+        return None
+
+    def request_download_link(self, job):
+        headers = {
+            'Host': urlparse(download_api_url).netloc,
+            'Referer': 'https://spotidownloader.com/',
+            'Origin': 'https://spotidownloader.com',
+            'Authorization': f'Bearer {self.token}',
+            'Content-Type': 'application/json'
+        }
+        
+        payload = {"id": job.track.id}
+        
+        with tracer.span("download_link", track=job.track.id) as span:
+            response = httpSession.post(
+                download_api_url,
+                headers=headers,
+                json=payload,
+                timeout=30
+            )
+            span["status"] = response.status_code
+        
+        if response.status_code != 200:
+            return False, f"API request failed with status code: {response.status_code}, Response: {response.text}"
+        
+        data = response.json()
+        if not data.get('success'):
+            return False, f"API request failed: {data.get('error', 'Unknown error')}"
+
+        job.link = data['link']
+        return None
+
+    def reuse_existing_file(self, entry, filepath):
+        if self.existing_file_action == "move":
+            shutil.move(entry.path, filepath)
+            library_index.remove(entry.path)
+            library_index.store(filepath, entry)
+            return True, "File already exists - moved"
+        
+        if self.existing_file_action == "link":
+            try:
+                os.link(entry.path, filepath)
+            except OSError as e:
+                self.progress(f"Error hard-linking existing file: {e}", 0)
+                return True, "File already exists - skipped"
+            library_index.store(filepath, entry)
+            return True, "File already exists - linked"
+        
+        return True, "File already exists - skipped"
+
+    def transfer_audio(self, job):
+        if not self.wait_if_paused():
+            return False, "Download stopped by user"
+        
+        state = job.resume
+        audio_response = None
+        link_refreshed = False
+        if state:
+            audio_response = self.open_audio_stream(job, get_range_headers(state))
+            if is_matching_range(audio_response, state):
+                self.progress(
+                    f"Resuming: {job.track.title} - {job.track.artists} "
+                    f"from {state['received'] / 1048576:.1f} MB", 0)
+            elif audio_response.status_code == 200:
+                state = None
+            else:
+                audio_response.close()
+                audio_response = None
+                state = None
+                discard_partial(job.temp_filepath)
+                result = self.request_download_link(job)
+                if result:
+                    return result
+                link_refreshed = True
+        
+        if audio_response is None:
+            audio_response = self.open_audio_stream(job)
+            if audio_response.status_code in expired_link_statuses and not link_refreshed:
+                audio_response.close()
+                result = self.request_download_link(job)
+                if result:
+                    return result
+                audio_response = self.open_audio_stream(job)
+        
+        with audio_response:
+            if audio_response.status_code not in (200, 206):
+                return False, f"Failed to download audio file. Status code: {audio_response.status_code}"
+            
+            if state is None:
+                state = new_partial_state(job.link, audio_response)
+            
+            received_before = state["received"]
+            with tracer.span("audio_body", track=job.track.id, status=audio_response.status_code) as span:
+                completed = self.stream_to_file(audio_response, job, state)
+                job.transferred_bytes = span["bytes"] = state["received"] - received_before
+                span["completed"] = completed
+            if not completed:
+                return False, "Download stopped by user"
+        
+        return None
+
+    def open_audio_stream(self, job, extra_headers=None):
+        link = job.link
+        host = link.split('//', 1)[1].split('/', 1)[0]
+        
+        download_headers = {
+            'Host': host,
+            'Referer': 'https://spotidownloader.com/',
+            'Origin': 'https://spotidownloader.com'
+        }
+        download_headers.update(extra_headers or {})
+        
+        with tracer.span("audio_ttfb", track=job.track.id, resumed=bool(extra_headers)) as span:
+            response = httpSession.get(link, headers=download_headers, timeout=300, stream=True)
+            span["status"] = response.status_code
+        return response
+
+    def validate_audio(self, job):
+        with tracer.span("validation", track=job.track.id) as span:
+            entry = probe_file(job.temp_filepath)
+            span["bytes"] = entry.size
+            span["valid"] = entry.valid
+        if not entry.valid:
+            discard_partial(job.temp_filepath)
+            return False, "Downloaded file appears to be corrupted"
+        
+        with tracer.span("rename", track=job.track.id):
+            os.replace(job.temp_filepath, job.filepath)
+        discard_partial(job.temp_filepath, keep_data=True)
+        library_index.store(job.filepath, entry)
+        return None
+
+    def build_tag(self, job):
+        image_data = None
+        if job.track.image_url:
+            try:
+                image_data = cover_cache.get(job.track.image_url)
+            except Exception as e:
+                self.progress(f"Error adding cover art: {e}", 0)
+        
+        with tracer.span("tagging", track=job.track.id) as span:
+            job.tag_data = build_id3_tag(job.track, image_data)
+            span["bytes"] = len(job.tag_data)
+        return None
+
+    def stream_to_file(self, response, job, state):
+        filepath, track, tag_data = job.temp_filepath, job.track, job.tag_data
+        total_bytes = state["length"]
+        next_report = self.progress_step
+        
+        if state["received"]:
+            file = open(filepath, "r+b")
+            file.truncate(state["tag_length"] + state["written"])
+            file.seek(0, os.SEEK_END)
+            stripper = ID3v2Stripper(state["strip_remaining"])
+        else:
+            file = open(filepath, "wb")
+            file.write(tag_data)
+            state["tag_length"] = len(tag_data)
+            stripper = ID3v2Stripper()
+        save_partial(filepath, state)
+        
+        completed = False
+        try:
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                if not self.wait_if_paused():
+                    return False
+                if not chunk:
+                    continue
+                
+                data = stripper.feed(chunk)
+                file.write(data)
+                state["received"] += len(chunk)
+                state["written"] += len(data)
+                
+                downloaded_bytes = state["received"]
+                if self.on_event:
+                    self.on_event("track_progress", index=job.index, track=track, received=downloaded_bytes, total=total_bytes)
+                if total_bytes and downloaded_bytes / total_bytes >= next_report and downloaded_bytes < total_bytes:
+                    self.progress(
+                        f"Downloading: {track.title} - {track.artists} "
+                        f"({downloaded_bytes / 1048576:.1f}/{total_bytes / 1048576:.1f} MB)", 0)
+                    while next_report <= downloaded_bytes / total_bytes:
+                        next_report += self.progress_step
+            
+            file.write(stripper.flush())
+            completed = True
+        finally:
+            file.close()
+            if not completed:
+                state["received"] -= len(stripper.header)
+                state["strip_remaining"] = stripper.remaining
+                save_partial(filepath, state)
+        
+        return True
+
+    def scan_existing_files(self):
+        started_at = time.monotonic()
+        try:
+            library_index.refresh(self.library_root)
+        except Exception as e:
+            self.progress(f"Error refreshing library index: {e}", 0)
+        self.progress(library_index.format_stats(time.monotonic() - started_at), 0)
+        
+        return sum(1 for track in self.tracks
+                   if library_index.is_valid(self.get_output_filepath(track))
+                   or library_index.find_track(track.id, track.isrc, self.library_root))
+
+    def wait_if_paused(self):
+        return self.pause_gate.wait(self.cancel_token)
+
+    def get_context(self):
+        return {
+            "outpath": self.outpath,
+            "is_single_track": self.is_single_track,
+            "is_album": self.is_album,
+            "is_playlist": self.is_playlist,
+            "album_or_playlist_name": self.album_or_playlist_name
+        }
+
+    def schedule_retry(self, job, success, error_message):
+        if self.is_stopped:
+            return None
+        
+        self.release_link_slot(job)
+        category = classify_error(error_message)
+        limit = retry_limits.get(category, 0)
+        if job.retries >= limit:
+            return None
+        
+        delay = backoff_delay(job.retries + 1, category)
+        job.link = ""
+        job.resume = None
+        self.progress(
+            f"Retrying in {delay:.1f}s ({job.retries + 1}/{limit}): {job.track.title} - {job.track.artists}\n"
+            f"Error: {error_message}", 0)
+        self.emit("track_retry", index=job.index, track=job.track, attempt=job.retries + 1, delay=delay, error=error_message)
+        return delay
+
+    def record_result(self, job, success, error_message):
+        if self.track_claims and job.track.id:
+            self.track_claims.release(job.track.id, self)
+        if job.filepath:
+            self.path_claims.release(job.filepath, job)
+        self.release_link_slot(job)
+        if self.is_stopped:
+            return
+        
+        track = job.track
+        with self.lock:
+            self.completed_count += 1
+            percentage = int(self.completed_count / self.total_tracks * 100)
+            if success:
+                if error_message.startswith("File already exists"):
+                    self.skipped_tracks.append(track)
+                    status = "skipped"
+                else:
+                    self.successful_tracks.append(track)
+                    status = "downloaded"
+            else:
+                self.failed_tracks.append((track.title, track.artists, error_message))
+                status = "failed"
+        self.emit("track_finished", index=job.index, track=track, status=status, message=error_message)
+        
+        if not success:
+            category = classify_error(error_message)
+            if category != "stopped":
+                dead_letter_queue.add(asdict(track), self.get_context(), error_message, category, job.retries + 1)
+        
+        if success:
+            if error_message.startswith("File already exists"):
+                action = error_message.rsplit(" - ", 1)[1].capitalize()
+                self.progress(f"{action} (already exists): {track.title} - {track.artists}", percentage)
+            else:
+                self.progress(f"Successfully downloaded: {track.title} - {track.artists}", percentage)
+        else:
+            self.progress(f"Failed to download: {track.title} - {track.artists}\nError: {error_message}", percentage)
+
+    def run(self):
+        tracer.start_run("download")
+        try:
+            result = self.run_pipeline()
+        except Exception as e:
+            result = (False, str(e))
+        except BaseException:
+            self.stop()
+            tracer.end_run()
+            raise
+        
+        summary = tracer.end_run()
+        if summary and not self.is_stopped:
+            self.progress(format_summary(summary), 0)
+        
+        if result:
+            self.finish(*result)
+        else:
+            self.emit("run_finished", success=False, message="Download stopped by user",
+                      failed=self.failed_tracks, successful=self.successful_tracks, skipped=self.skipped_tracks)
+
+    def run_pipeline(self):
+        existing_count = self.scan_existing_files()
+        if existing_count > 0:
+            self.progress(f"Found {existing_count} already downloaded tracks (will be skipped)", 0)
+        
+        if self.max_workers > 1:
+            self.progress(f"Downloading with {self.max_workers} concurrent workers", 0)
+        
+        self.pipeline = pipeline = DownloadPipeline([
+            ("Link resolution", partial(self.run_stage, self.resolve_link), self.max_workers),
+            ("Tag building", partial(self.run_stage, self.build_tag), self.tagging_workers),
+            ("Audio transfer", partial(self.run_stage, self.run_transfer), self.max_workers),
+            ("Validation", partial(self.run_stage, self.validate_audio), self.validation_workers)
+        ], self.record_result, self.schedule_retry)
+        pipeline.run([TrackJob(i, track) for i, track in enumerate(self.tracks)])
+        
+        if self.is_stopped:
+            return None
+
+        self.progress(f"Pipeline throughput:\n{pipeline.throughput_report()}", 0)
+        
+        dead_letter_queue.discard([track.id for track in self.successful_tracks + self.skipped_tracks])
+
+        success_message = "Download completed!"
+        if self.failed_tracks:
+            success_message += f"\n\nFailed downloads: {len(self.failed_tracks)} tracks (saved for Retry Failed)"
+        if self.successful_tracks:
+            success_message += f"\n\nSuccessful downloads: {len(self.successful_tracks)} tracks"
+        if self.skipped_tracks:
+            success_message += f"\n\nSkipped (already exists): {len(self.skipped_tracks)} tracks"
+        return True, success_message
+
+    def finish(self, success, message):
+        self.emit("run_finished", success=success, message=message,
+                  failed=self.failed_tracks, successful=self.successful_tracks, skipped=self.skipped_tracks)
+        self.finished(success, message, self.failed_tracks, self.successful_tracks, self.skipped_tracks)
+
+    def pause(self):
+        self.pause_gate.pause()
+        self.progress("Download process paused.", 0)
+
+    def resume(self):
+        self.pause_gate.resume()
+        self.progress("Download process resumed.", 0)
+
+    def stop(self): 
+        self.cancel_token.cancel()
+        if self.pipeline:
+            self.pipeline.cancel("Download stopped by user")
@@ -0,0 +1,160 @@
+import time
+import threading
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from retryScheduler import RetryScheduler
+
+deferred = object()
+
+@dataclass
+class TrackJob:
+    index: int
+    track: object
+    filepath: str = ""
+    temp_filepath: str = ""
+    link: str = ""
+    tag_data: bytes = b""
+    resume: dict = None
+    retries: int = 0
+    transferred_bytes: int = 0
+    link_slot: bool = False
+
+class PipelineStage:
+    def __init__(self, name, handler, max_workers):
+        self.name = name
+        self.handler = handler
+        self.max_workers = max(1, int(max_workers))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name.replace(" ", "-"))
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.bytes = 0
+        self.busy_time = 0.0
+        self.started_at = None
+        self.finished_at = None
+
+    def record(self, started_at, finished_at, byte_count):
+        with self.lock:
+            self.processed += 1
+            self.bytes += byte_count
+            self.busy_time += finished_at - started_at
+            if self.started_at is None or started_at < self.started_at:
+                self.started_at = started_at
+            if self.finished_at is None or finished_at > self.finished_at:
+                self.finished_at = finished_at
+
+    def throughput(self):
+        with self.lock:
+            if not self.processed:
+                return f"{self.name}: idle"
+
+            span = max(self.finished_at - self.started_at, 1e-6)
+            text = (f"{self.name}: {self.processed} tracks in {span:.1f}s "
+                    f"({self.processed / span:.2f} tracks/s, {self.max_workers} workers, "
+                    f"{self.busy_time / (span * self.max_workers) * 100:.0f}% busy")
+            if self.bytes:
+                text += f", {self.bytes / 1048576 / span:.2f} MB/s"
+            return text + ")"
+
+class DownloadPipeline:
+    def __init__(self, stages, on_complete, retry_delay=None):
+        self.stages = [PipelineStage(name, handler, workers) for name, handler, workers in stages]
+        self.on_complete = on_complete
+        self.retry_delay = retry_delay
+        self.retries = RetryScheduler() if retry_delay else None
+        self.remaining = 0
+        self.waiting = {}
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.cancelled = False
+
+    def run(self, jobs):
+        self.remaining = len(jobs)
+        interrupted = True
+        try:
+            if jobs:
+                for job in jobs:
+                    self.submit(0, job)
+                self.done.wait()
+            interrupted = False
+        except BaseException:
+            self.cancelled = True
+            raise
+        finally:
+            if self.retries:
+                self.retries.close()
+            for stage in self.stages:
+                stage.executor.shutdown(wait=not interrupted, cancel_futures=self.cancelled)
+
+    def submit(self, stage_index, job):
+        if self.cancelled:
+            return
+        try:
+            self.stages[stage_index].executor.submit(self.execute, stage_index, job)
+        except RuntimeError:
+            if not self.cancelled:
+                raise
+
+    def execute(self, stage_index, job):
+        stage = self.stages[stage_index]
+        job.transferred_bytes = 0
+        started_at = time.monotonic()
+        try:
+            result = stage.handler(job)
+        except Exception as e:
+            result = (False, f"Exception occurred: {str(e)}")
+        if result is deferred:
+            return
+        stage.record(started_at, time.monotonic(), job.transferred_bytes)
+
+        if result is None and stage_index + 1 < len(self.stages):
+            self.submit(stage_index + 1, job)
+            return
+
+        result = result or (True, "")
+        if not result[0] and self.retries:
+            delay = self.retry_delay(job, *result)
+            if delay is not None:
+                self.retries.schedule(delay, job, self.retry)
+                return
+
+        self.finish(job, result)
+
+    def retry(self, job):
+        job.retries += 1
+        self.submit(0, job)
+
+    def defer(self, future, stage_index, job):
+        with self.lock:
+            self.waiting[id(job)] = job
+        future.add_done_callback(lambda _: self.resume_deferred(stage_index, job))
+
+    def resume_deferred(self, stage_index, job):
+        with self.lock:
+            if self.waiting.pop(id(job), None) is None:
+                return
+        self.submit(stage_index, job)
+
+    def cancel(self, message):
+        self.cancelled = True
+        if self.retries:
+            for job in self.retries.cancel_all():
+                self.finish(job, (False, message))
+        with self.lock:
+            waiting, self.waiting = list(self.waiting.values()), {}
+        for job in waiting:
+            self.finish(job, (False, message))
+        for stage in self.stages:
+            stage.executor.shutdown(wait=False, cancel_futures=True)
+        self.done.set()
+
+    def finish(self, job, result):
+        try:
+            self.on_complete(job, *result)
+        finally:
+            with self.lock:
+                self.remaining -= 1
+                if self.remaining <= 0:
+                    self.done.set()
+
+    def throughput_report(self):
+        return "\n".join(f"• {stage.throughput()}" for stage in self.stages)
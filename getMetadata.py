@@ -1,13 +1,18 @@
-from time import sleep
 from urllib.parse import urlparse, parse_qs
 from pathlib import Path
-import requests
 import json
 import time
 import pyotp
 import base64
 from random import randrange
-from typing import Dict, Any, List, Tuple
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import httpSession
+from metadataCache import metadata_cache
+from rateLimiter import rate_limiter, parse_retry_after, max_throttle_retries
+from playlistSync import load_sync_state, is_snapshot_unchanged, apply_playlist_sync
+from tracing import tracer
 
 # https://github.com/visagenull/Spotify-Free
 def get_random_user_agent():
@@ -20,7 +25,7 @@ def generate_totp():
     
     try:
         url = "https://raw.githubusercontent.com/afkarxyz/secretBytes/refs/heads/main/secrets/secretBytes.json"
-        resp = requests.get(url, timeout=10)
+        resp = httpSession.get(url, timeout=10)
         if resp.status_code != 200:
             raise Exception(f"GitHub fetch failed with status: {resp.status_code}")
         secrets_list = resp.json()
@@ -57,7 +62,7 @@ def generate_totp():
     }
 
     try:
-        resp = requests.get("https://open.spotify.com/api/server-time", headers=headers, timeout=10)
+        resp = httpSession.get("https://open.spotify.com/api/server-time", headers=headers, timeout=10)
         if resp.status_code != 200:
             raise Exception(f"Failed to get server time. Status code: {resp.status_code}")
         data = resp.json()
@@ -74,6 +79,11 @@ album_base_url = 'https://api.spotify.com/v1/albums/{}'
 track_base_url = 'https://api.spotify.com/v1/tracks/{}'
 artist_base_url = 'https://api.spotify.com/v1/artists/{}'
 artist_albums_url = 'https://api.spotify.com/v1/artists/{}/albums'
+tracks_bulk_url = 'https://api.spotify.com/v1/tracks?ids={}'
+tracks_bulk_limit = 50
+albums_bulk_url = 'https://api.spotify.com/v1/albums?ids={}'
+albums_bulk_limit = 20
+max_concurrency = 16
 headers = {
     'User-Agent': get_random_user_agent(),
     'Accept': 'application/json',
@@ -133,22 +143,6 @@ def parse_uri(uri):
 
     raise SpotifyInvalidUrlException("ERROR: unable to determine Spotify URL type or type is unsupported.")
 
-def get_json_from_api(api_url, access_token):
-    headers.update({'Authorization': 'Bearer {}'.format(access_token)})
-    
-    req = requests.get(api_url, headers=headers, timeout=10)
-
-    if req.status_code == 429:
-        seconds = int(req.headers.get("Retry-After", "5")) + 1
-        print(f"INFO: rate limited! Sleeping for {seconds} seconds")
-        sleep(seconds)
-        return None
-
-    if req.status_code != 200:
-        raise SpotifyWebsiteParserException(f"ERROR: {api_url} gave us not a 200. Instead: {req.status_code}")
-        
-    return req.json()
-
 def get_access_token():
     try:
         totp, server_time, totp_version = generate_totp()
@@ -167,268 +161,288 @@ def get_access_token():
             'buildDate': '2025-07-02'
         }
         
-        req = requests.get(token_url, headers=headers, params=params, timeout=10)
+        with tracer.span("token") as span:
+            req = httpSession.get(token_url, headers=headers, params=params, timeout=10)
+            span["status"] = req.status_code
         if req.status_code != 200:
             return {"error": f"Failed to get access token. Status code: {req.status_code}"}
         return req.json()
     except Exception as e:
         return {"error": f"Failed to get access token: {str(e)}"}
 
-def fetch_tracks_in_batches(url: str, access_token: str, batch_size: int = 100, delay: float = 1.0) -> Tuple[List[Dict[str, Any]], int]:
-    all_tracks = []
-    current_batch = 0
-    
-    while url:
-        print(f"Batch : {current_batch}")
+
+class SpotifyClient:
+    def __init__(self, access_token, concurrency=max_concurrency):
+        self.access_token = access_token
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.executor = None
+
+    async def __aenter__(self):
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="metadata")
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.executor.shutdown(wait=False)
+
+    async def send(self, api_url, request_headers):
+        loop = asyncio.get_running_loop()
+        req = await loop.run_in_executor(self.executor, lambda: httpSession.get(api_url, headers=request_headers, timeout=10))
+        return req.status_code, req.headers, req.content
+
+    async def get_json(self, api_url, revalidate=False):
+        cached = await asyncio.to_thread(metadata_cache.lookup, api_url)
+        if cached and cached.is_fresh and not revalidate:
+            metadata_cache.count("hits")
+            return cached.data
+        
+        request_headers = dict(headers)
+        request_headers['Authorization'] = 'Bearer {}'.format(self.access_token)
+        if cached:
+            request_headers.update(cached.validators())
+        
+        with tracer.span("metadata_page", url=api_url.split("/v1", 1)[-1]) as span:
+            for _ in range(max_throttle_retries + 1):
+                delay = rate_limiter.reserve()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                async with self.semaphore:
+                    status, response_headers, body = await self.send(api_url, request_headers)
+                if status != 429:
+                    break
+                
+                seconds = parse_retry_after(response_headers.get("Retry-After"))
+                tracer.event("rate_limited", url=span["url"], retry_after=seconds)
+                rate_limiter.on_throttle(seconds)
+            else:
+                raise SpotifyWebsiteParserException(f"ERROR: {api_url} is still rate limited after {max_throttle_retries} retries")
+            
+            rate_limiter.on_success()
+            span["status"] = status
+            span["bytes"] = len(body)
+
+            if status == 304 and cached:
+                metadata_cache.count("revalidated")
+                await asyncio.to_thread(metadata_cache.touch, api_url)
+                return cached.data
+
+            if status != 200:
+                raise SpotifyWebsiteParserException(f"ERROR: {api_url} gave us not a 200. Instead: {status}")
+            
+            data = json.loads(body)
+        metadata_cache.count("misses")
+        await asyncio.to_thread(metadata_cache.store, api_url, data, response_headers.get("ETag"), response_headers.get("Last-Modified"))
+        return data
+
+    async def fetch_paginated(self, url, limit, revalidate=False, first_page=None):
+        separator = "&" if "?" in url else "?"
+        page_url = url + separator + "offset={}&limit=" + str(limit)
         
-        url_parts = url.split("offset=")
-        if len(url_parts) > 1:
-            offset_part = url_parts[1].split("&")[0]
-            print(f"Offset : {offset_part}")
-        print("-------------")
+        if first_page is None or 'total' not in first_page:
+            first_page = await self.get_json(page_url.format(0), revalidate)
+            if not first_page:
+                return [], 0
         
-        track_data = get_json_from_api(url, access_token)
-        if not track_data:
-            break
+        items = list(first_page.get('items', []))
+        total = first_page.get('total', len(items))
+        offsets = list(range(limit, total, limit)) if len(items) < total else []
         
-        items = track_data.get('items', [])
-        all_tracks.extend(items)
+        pages = await asyncio.gather(
+            *(self.get_json(page_url.format(offset), revalidate) for offset in offsets),
+            return_exceptions=True
+        )
+        for page in pages:
+            if isinstance(page, Exception):
+                raise page
+            items.extend(page.get('items', []))
         
-        url = track_data.get('next')
-        if url and "&locale=" in url:
-            url = url.split("&locale=")[0]
-            
-        if url and delay > 0:
-            sleep(delay)
+        return items, len(offsets) + 1
+
+    async def fetch_full_tracks(self, track_ids):
+        unique_ids = [track_id for track_id in dict.fromkeys(track_ids) if track_id]
+        batches = [unique_ids[i:i + tracks_bulk_limit] for i in range(0, len(unique_ids), tracks_bulk_limit)]
         
-        current_batch += 1
+        results = await asyncio.gather(
+            *(self.get_json(tracks_bulk_url.format(",".join(batch_ids))) for batch_ids in batches),
+            return_exceptions=True
+        )
         
-    return all_tracks, current_batch
+        full_tracks = {}
+        for data in results:
+            if isinstance(data, Exception):
+                tracer.event("metadata_error", message=f"Error getting track details: {str(data)}")
+                continue
+            for track in (data or {}).get('tracks', []):
+                if track and track.get('id'):
+                    full_tracks[track['id']] = track
+        return full_tracks
+
+    async def fetch_album_tracks(self, album_ids):
+        unique_ids = [album_id for album_id in dict.fromkeys(album_ids) if album_id]
+        batches = [unique_ids[i:i + albums_bulk_limit] for i in range(0, len(unique_ids), albums_bulk_limit)]
+        
+        results = await asyncio.gather(
+            *(self.get_json(albums_bulk_url.format(",".join(batch_ids))) for batch_ids in batches),
+            return_exceptions=True
+        )
+        
+        albums = []
+        for data in results:
+            if isinstance(data, Exception):
+                raise data
+            albums.extend(album for album in (data or {}).get('albums', []) if album and album.get('id'))
+        
+        pages = await asyncio.gather(
+            *(self.fetch_paginated(f'{album_base_url.format(album["id"])}/tracks', 50, first_page=album.get('tracks'))
+              for album in albums),
+            return_exceptions=True
+        )
+        album_tracks = {}
+        for album, page in zip(albums, pages):
+            if isinstance(page, Exception):
+                raise page
+            album_tracks[album['id']] = page[0]
+        return album_tracks
+
+_loop = None
+_loop_lock = threading.Lock()
+
+def get_event_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="metadata-event-loop", daemon=True).start()
+    return _loop
 
-def get_raw_spotify_data(spotify_url, batch: bool = False, delay: float = 1.0):
+def run_coroutine(coroutine):
+    return asyncio.run_coroutine_threadsafe(coroutine, get_event_loop()).result()
+
+async def call_client(access_token, method, *args):
+    async with SpotifyClient(access_token) as client:
+        return await getattr(client, method)(*args)
+
+def get_json_from_api(api_url, access_token, revalidate=False):
+    return run_coroutine(call_client(access_token, "get_json", api_url, revalidate))
+
+def fetch_full_tracks(track_ids, access_token):
+    return run_coroutine(call_client(access_token, "fetch_full_tracks", track_ids))
+
+def fetch_album_tracks(album_ids, access_token):
+    return run_coroutine(call_client(access_token, "fetch_album_tracks", album_ids))
+
+async def get_raw_spotify_data_async(spotify_url, batch=False, sync=False, client_class=SpotifyClient):
     url_info = parse_uri(spotify_url)
-    token = get_access_token()
+    token = await asyncio.to_thread(get_access_token)
     
     if "error" in token:
         return token
     
     access_token = token["accessToken"]
-    raw_data = {}
     
-    if url_info['type'] == "playlist":
-        try:
-            playlist_data = get_json_from_api(
-                playlist_base_url.format(url_info["id"]), 
-                access_token
-            )
-            if not playlist_data:
-                return {"error": "Failed to get playlist data"}
+    async with client_class(access_token) as client:
+        if url_info['type'] == "playlist":
+            try:
+                playlist_data = await client.get_json(playlist_base_url.format(url_info["id"]), revalidate=sync)
+                if not playlist_data:
+                    return {"error": "Failed to get playlist data"}
+                    
+                raw_data = playlist_data
                 
-            raw_data = playlist_data
-            total_tracks = playlist_data.get('tracks', {}).get('total', 0)
-            
-            if batch:
-                tracks_url = f'https://api.spotify.com/v1/playlists/{url_info["id"]}/tracks?limit=100'
-                tracks, num_batches = fetch_tracks_in_batches(tracks_url, access_token, 100, delay)
-                raw_data['tracks']['items'] = tracks
-                raw_data['_batch_count'] = num_batches
-                raw_data['_batch_enabled'] = True
+                if sync:
+                    sync_state = await asyncio.to_thread(load_sync_state, url_info["id"])
+                    raw_data['_sync'] = {"previous_state": sync_state}
+                    if is_snapshot_unchanged(sync_state, playlist_data):
+                        raw_data['_sync']["unchanged"] = True
+                        raw_data['tracks']['items'] = []
+                        return raw_data
                 
-                if len(tracks) < total_tracks:
-                    last_offset = len(tracks)
-                    remaining_tracks = []
-                    
-                    while last_offset < total_tracks:
-                        print(f"Batch : {num_batches}")
-                        print(f"Offset : {last_offset}")
-                        print("-------------")
-                        
-                        remainder_url = f'https://api.spotify.com/v1/playlists/{url_info["id"]}/tracks?offset={last_offset}&limit=100'
-                        track_data = get_json_from_api(remainder_url, access_token)
-                        
-                        if not track_data or not track_data.get('items'):
-                            break
-                            
-                        items = track_data.get('items', [])
-                        remaining_tracks.extend(items)
-                        
-                        if len(items) < 100:
-                            break
-                            
-                        last_offset += len(items)
-                        num_batches += 1
-                        
-                        if delay > 0:
-                            sleep(delay)
-                    
-                    tracks.extend(remaining_tracks)
-                    raw_data['tracks']['items'] = tracks
-                    raw_data['_batch_count'] = num_batches
-            else:
-                tracks = []
-                tracks_url = f'https://api.spotify.com/v1/playlists/{url_info["id"]}/tracks?limit=100'
-                while tracks_url:
-                    track_data = get_json_from_api(tracks_url, access_token)
-                    if not track_data:
-                        break
-                        
-                    tracks.extend(track_data['items'])
-                    tracks_url = track_data.get('next')
-                    if tracks_url and "&locale=" in tracks_url:
-                        tracks_url = tracks_url.split("&locale=")[0]
-                    
+                tracks, num_batches = await client.fetch_paginated(
+                    f'{playlist_base_url.format(url_info["id"])}/tracks', 100,
+                    revalidate=sync, first_page=playlist_data.get('tracks')
+                )
                 raw_data['tracks']['items'] = tracks
-                raw_data['_batch_enabled'] = False
+                raw_data['_batch_enabled'] = batch
+                if batch:
+                    raw_data['_batch_count'] = num_batches
+                return raw_data
+            except Exception as e:
+                return {"error": f"Failed to get playlist data: {str(e)}"}
                 
-        except Exception as e:
-            return {"error": f"Failed to get playlist data: {str(e)}"}
-            
-    elif url_info["type"] == "album":
-        try:
-            album_data = get_json_from_api(
-                album_base_url.format(url_info["id"]),
-                access_token
-            )
-            if not album_data:
-                return {"error": "Failed to get album data"}
+        elif url_info["type"] == "album":
+            try:
+                album_data = await client.get_json(album_base_url.format(url_info["id"]))
+                if not album_data:
+                    return {"error": "Failed to get album data"}
                 
-            album_data['_token'] = access_token
-            raw_data = album_data
-            total_tracks = album_data.get('total_tracks', 0)
-            
-            if batch:
-                tracks_url = f'{album_base_url.format(url_info["id"])}/tracks?limit=50'
-                tracks, num_batches = fetch_tracks_in_batches(tracks_url, access_token, 50, delay)
-                raw_data['tracks']['items'] = tracks
-                raw_data['_batch_count'] = num_batches
-                raw_data['_batch_enabled'] = True
+                tracks, num_batches = await client.fetch_paginated(
+                    f'{album_base_url.format(url_info["id"])}/tracks', 50, first_page=album_data.get('tracks')
+                )
+                album_data['_token'] = access_token
+                album_data['tracks']['items'] = tracks
+                album_data['_full_tracks'] = await client.fetch_full_tracks([track.get('id', '') for track in tracks])
+                album_data['_batch_enabled'] = batch
+                if batch:
+                    album_data['_batch_count'] = num_batches
+                return album_data
+            except Exception as e:
+                return {"error": f"Failed to get album data: {str(e)}"}
                 
-                if len(tracks) < total_tracks:
-                    last_offset = len(tracks)
-                    remaining_tracks = []
-                    
-                    while last_offset < total_tracks:
-                        print(f"Batch : {num_batches}")
-                        print(f"Offset : {last_offset}")
-                        print("-------------")
-                        
-                        remainder_url = f'{album_base_url.format(url_info["id"])}/tracks?offset={last_offset}&limit=50'
-                        track_data = get_json_from_api(remainder_url, access_token)
-                        
-                        if not track_data or not track_data.get('items'):
-                            break
-                            
-                        items = track_data.get('items', [])
-                        remaining_tracks.extend(items)
-                        
-                        if len(items) < 50:
-                            break
-                            
-                        last_offset += len(items)
-                        num_batches += 1
-                        
-                        if delay > 0:
-                            sleep(delay)
-                    
-                    tracks.extend(remaining_tracks)
-                    raw_data['tracks']['items'] = tracks
-                    raw_data['_batch_count'] = num_batches
-            else:
-                tracks = []
-                tracks_url = f'{album_base_url.format(url_info["id"])}/tracks?limit=50'
-                while tracks_url:
-                    track_data = get_json_from_api(tracks_url, access_token)
-                    if not track_data:
-                        break
-                        
-                    tracks.extend(track_data['items'])
-                    tracks_url = track_data.get('next')
-                    if tracks_url and "&locale=" in tracks_url:
-                        tracks_url = tracks_url.split("&locale=")[0]
-                    
-                raw_data['tracks']['items'] = tracks
-                raw_data['_batch_enabled'] = False
+        elif url_info["type"] == "track":
+            try:
+                track_data = await client.get_json(track_base_url.format(url_info["id"]))
+                if not track_data:
+                    return {"error": "Failed to get track data"}
+                return track_data
+            except Exception as e:
+                return {"error": f"Failed to get track data: {str(e)}"}
                 
-        except Exception as e:
-            return {"error": f"Failed to get album data: {str(e)}"}
+        elif url_info["type"] == "artist_discography":
+            try:
+                artist_data = await client.get_json(artist_base_url.format(url_info["id"]))
+                if not artist_data:
+                    return {"error": "Failed to get artist data"}
                 
-    elif url_info["type"] == "track":
-        try:
-            track_data = get_json_from_api(
-                track_base_url.format(url_info["id"]),
-                access_token
-            )
-            if not track_data:
-                return {"error": "Failed to get track data"}
+                discography_type = url_info.get("discography_type", "all")
+                if discography_type == "all":
+                    include_groups = "album,single,compilation"
+                else:
+                    include_groups = discography_type
                 
-            raw_data = track_data
-        except Exception as e:
-            return {"error": f"Failed to get track data: {str(e)}"}
-            
-    elif url_info["type"] == "artist_discography":
-        try:
-            artist_data = get_json_from_api(
-                artist_base_url.format(url_info["id"]),
-                access_token
-            )
-            if not artist_data:
-                return {"error": "Failed to get artist data"}
-            
-            discography_type = url_info.get("discography_type", "all")
-            if discography_type == "all":
-                include_groups = "album,single,compilation"
-            else:
-                include_groups = discography_type
-            
-            albums = []
-            albums_url = f'{artist_albums_url.format(url_info["id"])}?include_groups={include_groups}&limit=50'
-            
-            if batch:
-                albums, num_batches = fetch_tracks_in_batches(albums_url, access_token, 50, delay)
-                raw_data = {
-                    "artist_info": artist_data,
-                    "albums": albums,
-                    "discography_type": discography_type,
-                    "_batch_count": num_batches,
-                    "_batch_enabled": True
-                }
-            else:
-                while albums_url:
-                    album_data = get_json_from_api(albums_url, access_token)
-                    if not album_data:
-                        break
-                        
-                    albums.extend(album_data['items'])
-                    albums_url = album_data.get('next')
-                    if albums_url and "&locale=" in albums_url:
-                        albums_url = albums_url.split("&locale=")[0]
+                albums, num_batches = await client.fetch_paginated(
+                    f'{artist_albums_url.format(url_info["id"])}?include_groups={include_groups}', 50
+                )
+                album_tracks = await client.fetch_album_tracks([album.get('id', '') for album in albums])
+                track_ids = [track.get('id', '') for tracks in album_tracks.values() for track in tracks]
                 
                 raw_data = {
                     "artist_info": artist_data,
                     "albums": albums,
                     "discography_type": discography_type,
-                    "_batch_enabled": False
+                    "_batch_enabled": batch,
+                    "_token": access_token,
+                    "_album_tracks": album_tracks,
+                    "_full_tracks": await client.fetch_full_tracks(track_ids)
                 }
+                if batch:
+                    raw_data["_batch_count"] = num_batches
+                return raw_data
+            except Exception as e:
+                return {"error": f"Failed to get artist discography data: {str(e)}"}
                 
-            raw_data['_token'] = access_token
-            
-        except Exception as e:
-            return {"error": f"Failed to get artist discography data: {str(e)}"}
-            
-    elif url_info["type"] == "artist":
-        try:
-            artist_data = get_json_from_api(
-                artist_base_url.format(url_info["id"]),
-                access_token
-            )
-            if not artist_data:
-                return {"error": "Failed to get artist data"}
-                
-            raw_data = artist_data
-        except Exception as e:
-            return {"error": f"Failed to get artist data: {str(e)}"}
+        elif url_info["type"] == "artist":
+            try:
+                artist_data = await client.get_json(artist_base_url.format(url_info["id"]))
+                if not artist_data:
+                    return {"error": "Failed to get artist data"}
+                return artist_data
+            except Exception as e:
+                return {"error": f"Failed to get artist data: {str(e)}"}
+    
+    return {}
 
-    return raw_data
+def get_raw_spotify_data(spotify_url, batch: bool = False, sync: bool = False):
+    return run_coroutine(get_raw_spotify_data_async(spotify_url, batch=batch, sync=sync))
 
 def format_track_data(track_data):
     artists = []
@@ -465,40 +479,39 @@ def format_album_data(album_data):
     
     image_url = album_data.get('images', [{}])[0].get('url', '') if album_data.get('images') else ''
     
+    items = album_data.get('tracks', {}).get('items', [])
+    access_token = album_data.get('_token', '')
+    full_tracks = album_data.get('_full_tracks')
+    if full_tracks is None:
+        full_tracks = fetch_full_tracks([track.get('id', '') for track in items], access_token) if access_token else {}
+    
     track_list = []
-    for track in album_data.get('tracks', {}).get('items', []):
-        track_id = track.get('id', '')
-        try:
-            track_data = get_json_from_api(
-                track_base_url.format(track_id),
-                album_data.get('_token', '')
-            )
-            if track_data:
-                formatted_track = format_track_data(track_data)
-                track_list.append(formatted_track['track'])
-            else:
-                track_artists = []
-                track_artist_ids = []
-                for artist in track.get('artists', []):
-                    track_artists.append(artist['name'])
-                    track_artist_ids.append(artist['id'])
-                    
-                track_list.append({
-                    "id": track.get('id', ''),
-                    "uri": track.get('uri', ''),
-                    "artists": ", ".join(track_artists),
-                    "artist_ids": track_artist_ids,
-                    "name": track.get('name', ''),
-                    "album_id": album_data.get('id', ''),
-                    "album_name": album_data.get('name', ''),
-                    "duration_ms": track.get('duration_ms', 0),
-                    "images": image_url,
-                    "release_date": album_data.get('release_date', ''),
-                    "track_number": track.get('track_number', 0),
-                    "isrc": track.get('external_ids', {}).get('isrc', '')
-                })
-        except:
+    for track in items:
+        full_track = full_tracks.get(track.get('id', ''))
+        if full_track:
+            track_list.append(format_track_data(full_track)['track'])
             continue
+        
+        track_artists = []
+        track_artist_ids = []
+        for artist in track.get('artists', []):
+            track_artists.append(artist['name'])
+            track_artist_ids.append(artist['id'])
+            
+        track_list.append({
+            "id": track.get('id', ''),
+            "uri": track.get('uri', ''),
+            "artists": ", ".join(track_artists),
+            "artist_ids": track_artist_ids,
+            "name": track.get('name', ''),
+            "album_id": album_data.get('id', ''),
+            "album_name": album_data.get('name', ''),
+            "duration_ms": track.get('duration_ms', 0),
+            "images": image_url,
+            "release_date": album_data.get('release_date', ''),
+            "track_number": track.get('track_number', 0),
+            "isrc": track.get('external_ids', {}).get('isrc', '')
+        })
     
     album_info = {
         "id": album_data.get('id', ''),
@@ -600,7 +613,7 @@ def format_artist_discography_data(discography_data):
         formatted_artist_info["batch"] = f"{discography_data.get('_batch_count', 1)}"
     
     album_list = []
-    all_tracks = []
+    album_images = []
     
     for album in albums:
         album_image = ''
@@ -627,65 +640,52 @@ def format_artist_discography_data(discography_data):
         }
         
         album_list.append(album_info)
-        
-        if access_token and album.get('id'):
-            try:
-                tracks = []
-                tracks_url = f'{album_base_url.format(album.get("id"))}/tracks?limit=50'
-                
-                while tracks_url:
-                    track_data = get_json_from_api(tracks_url, access_token)
-                    if not track_data:
-                        break
-                        
-                    tracks.extend(track_data['items'])
-                    tracks_url = track_data.get('next')
-                    if tracks_url and "&locale=" in tracks_url:
-                        tracks_url = tracks_url.split("&locale=")[0]
-                
-                for track in tracks:
-                    track_artists = []
-                    track_artist_ids = []
-                    for artist in track.get('artists', []):
-                        track_artists.append(artist['name'])
-                        track_artist_ids.append(artist['id'])
-                    
-                    track_id = track.get('id', '')
-                    track_isrc = ''
-                    
-                    if track_id:
-                        try:
-                            full_track_data = get_json_from_api(
-                                track_base_url.format(track_id),
-                                access_token
-                            )
-                            if full_track_data:
-                                track_isrc = full_track_data.get('external_ids', {}).get('isrc', '')
-                        except:
-                            pass
-                    
-                    formatted_track = {
-                        "id": track.get('id', ''),
-                        "uri": track.get('uri', ''),
-                        "artists": ", ".join(track_artists),
-                        "artist_ids": track_artist_ids,
-                        "name": track.get('name', ''),
-                        "album_id": album.get('id', ''),
-                        "album_name": album.get('name', ''),
-                        "album_type": album.get('album_type', ''),
-                        "duration_ms": track.get('duration_ms', 0),
-                        "images": album_image,
-                        "release_date": album.get('release_date', ''),
-                        "track_number": track.get('track_number', 0),
-                        "external_urls": track.get('external_urls', {}).get('spotify', ''),
-                        "isrc": track_isrc
-                    }
-                    
-                    all_tracks.append(formatted_track)
-                    
-            except Exception as e:
-                print(f"Error getting tracks for album {album.get('name', '')}: {str(e)}")
-                continue
+        album_images.append(album_image)
+    
+    tracks_by_album = discography_data.get('_album_tracks')
+    if tracks_by_album is None:
+        tracks_by_album = {}
+        if access_token:
+            tracks_by_album = fetch_album_tracks([album.get('id', '') for album in albums], access_token)
+    
+    album_tracks = [
+        (album, album_image, tracks_by_album[album.get('id')])
+        for album, album_image in zip(albums, album_images)
+        if album.get('id') in tracks_by_album
+    ]
+    
+    track_ids = [track.get('id', '') for _, _, tracks in album_tracks for track in tracks]
+    full_tracks = discography_data.get('_full_tracks')
+    if full_tracks is None:
+        full_tracks = fetch_full_tracks(track_ids, access_token) if access_token else {}
+    
+    all_tracks = []
+    for album, album_image, tracks in album_tracks:
+        for track in tracks:
+            track_artists = []
+            track_artist_ids = []
+            for artist in track.get('artists', []):
+                track_artists.append(artist['name'])
+                track_artist_ids.append(artist['id'])
+            
+            full_track = full_tracks.get(track.get('id', ''), track)
+            
+            all_tracks.append({
+                "id": track.get('id', ''),
+                "uri": track.get('uri', ''),
+                "artists": ", ".join(track_artists),
+                "artist_ids": track_artist_ids,
+                "name": track.get('name', ''),
+                "album_id": album.get('id', ''),
+                "album_name": album.get('name', ''),
+                "album_type": album.get('album_type', ''),
+                "duration_ms": track.get('duration_ms', 0),
+                "images": album_image,
+                "release_date": album.get('release_date', ''),
+                "track_number": track.get('track_number', 0),
+                "external_urls": track.get('external_urls', {}).get('spotify', ''),
+                "isrc": full_track.get('external_ids', {}).get('isrc', '')
+            })
     
     return {
         "artist_info": formatted_artist_info,
@@ -731,14 +731,23 @@ def process_spotify_data(raw_data, data_type):
     except Exception as e:
         return {"error": f"Error processing data: {str(e)}"}
 
-def get_filtered_data(spotify_url, batch=False, delay=1.0):
-    raw_data = get_raw_spotify_data(spotify_url, batch=batch, delay=delay)
+def filter_raw_data(spotify_url, raw_data, sync=False):
     if raw_data and "error" not in raw_data:
         url_info = parse_uri(spotify_url)
         filtered_data = process_spotify_data(raw_data, url_info['type'])
+        if sync and url_info['type'] == "playlist" and "error" not in filtered_data:
+            filtered_data = apply_playlist_sync(filtered_data, raw_data)
         return filtered_data
     return {"error": "Failed to get raw data"}
 
+async def get_filtered_data_async(spotify_url, batch=False, sync=False, client_class=SpotifyClient):
+    raw_data = await get_raw_spotify_data_async(spotify_url, batch=batch, sync=sync, client_class=client_class)
+    return await asyncio.to_thread(filter_raw_data, spotify_url, raw_data, sync)
+
+def get_filtered_data(spotify_url, batch=False, sync=False):
+    raw_data = get_raw_spotify_data(spotify_url, batch=batch, sync=sync)
+    return filter_raw_data(spotify_url, raw_data, sync)
+
 if __name__ == '__main__':
     playlist = "https://open.spotify.com/playlist/37i9dQZEVXbNG2KDcFcKOF"
     album = "https://open.spotify.com/album/6J84szYCnMfzEcvIcfWMFL"
@@ -750,11 +759,11 @@ if __name__ == '__main__':
     artist_discography_compilations = "https://open.spotify.com/artist/0du5cEVh5yTK9QJze8zA0C/discography/compilation"
     
     print("=== Testing Artist Discography (All) ===")
-    filtered_discography = get_filtered_data(artist_discography_all, batch=True, delay=0.1)
+    filtered_discography = get_filtered_data(artist_discography_all, batch=True)
     print(json.dumps(filtered_discography, indent=2))
     
     print("\n=== Testing Playlist ===")
-    filtered_playlist = get_filtered_data(playlist, batch=True, delay=0.1)
+    filtered_playlist = get_filtered_data(playlist, batch=True)
     print(json.dumps(filtered_playlist, indent=2))
     
     print("\n=== Testing Album ===")
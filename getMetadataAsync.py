@@ -0,0 +1,45 @@
+import aiohttp
+import httpSession
+
+import getMetadata
+from getMetadata import SpotifyClient, filter_raw_data, run_coroutine, max_concurrency
+from httpFixtures import AsyncFixtureSession
+
+max_connections = 16
+
+class AsyncSpotifyClient(SpotifyClient):
+    def __init__(self, access_token, connections=max_connections, concurrency=max_concurrency):
+        super().__init__(access_token, concurrency)
+        self.connections = connections
+        self.session = None
+
+    async def __aenter__(self):
+        fixtures = httpSession.get_fixtures()
+        if fixtures and fixtures.mode == "replay":
+            self.session = AsyncFixtureSession(fixtures)
+            return self
+
+        connector = aiohttp.TCPConnector(limit=self.connections, limit_per_host=self.connections)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=10))
+        if fixtures:
+            self.session = AsyncFixtureSession(fixtures, self.session)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+
+    async def send(self, api_url, request_headers):
+        async with self.session.get(api_url, headers=request_headers) as resp:
+            return resp.status, resp.headers, await resp.read()
+
+async def get_raw_spotify_data_async(spotify_url, batch=False, sync=False):
+    return await getMetadata.get_raw_spotify_data_async(spotify_url, batch=batch, sync=sync, client_class=AsyncSpotifyClient)
+
+async def get_filtered_data_async(spotify_url, batch=False, sync=False):
+    return await getMetadata.get_filtered_data_async(spotify_url, batch=batch, sync=sync, client_class=AsyncSpotifyClient)
+
+def get_raw_spotify_data(spotify_url, batch=False, sync=False):
+    return run_coroutine(get_raw_spotify_data_async(spotify_url, batch=batch, sync=sync))
+
+def get_filtered_data(spotify_url, batch=False, sync=False):
+    return filter_raw_data(spotify_url, get_raw_spotify_data(spotify_url, batch=batch, sync=sync), sync)
@@ -0,0 +1,178 @@
+import gzip
+import json
+import time
+import base64
+import asyncio
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import httpSession
+from metadataCache import metadata_cache
+
+fixture_version = 1
+# Token requests carry a TOTP code and timestamps that differ on every run
+volatile_params = ("totp", "totpServerTime", "totpVer", "sTime", "cTime", "buildVer", "buildDate")
+conditional_headers = ("If-None-Match", "If-Modified-Since")
+kept_headers = ("Content-Type", "ETag", "Last-Modified", "Retry-After")
+
+class FixtureMissingException(Exception):
+    pass
+
+def get_key(method, url, params=None):
+    if params:
+        kept = sorted((key, str(value)) for key, value in params.items() if key not in volatile_params)
+        if kept:
+            url += ("&" if "?" in url else "?") + urlencode(kept)
+    return f"{method} {url}"
+
+def encode_body(body):
+    try:
+        return {"body": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"body": base64.b64encode(body).decode("ascii"), "encoding": "base64"}
+
+def decode_body(entry):
+    if entry.get("encoding") == "base64":
+        return base64.b64decode(entry["body"])
+    return entry["body"].encode("utf-8")
+
+class HttpFixtures:
+    def __init__(self, path, mode="replay", latency=0.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown fixture mode: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.positions = {}
+        if mode == "replay":
+            self.load()
+
+    def open(self, mode):
+        if self.path.suffix == ".gz":
+            return gzip.open(self.path, mode + "t", encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+
+    def load(self):
+        with self.open("r") as f:
+            data = json.load(f)
+        if data.get("version") != fixture_version:
+            raise ValueError(f"Unsupported fixture version: {data.get('version')}")
+        self.entries = data["entries"]
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            data = {"version": fixture_version, "entries": self.entries}
+        with self.open("w") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+
+    def record(self, key, status, headers, body):
+        entry = {"status": status, "headers": {name: headers[name] for name in kept_headers if name in headers}, **encode_body(body)}
+        with self.lock:
+            self.entries.setdefault(key, []).append(entry)
+
+    def replay(self, key):
+        with self.lock:
+            responses = self.entries.get(key)
+            if not responses:
+                raise FixtureMissingException(f"No recorded response for {key}")
+            position = self.positions.get(key, 0)
+            self.positions[key] = position + 1
+        return responses[min(position, len(responses) - 1)]
+
+    def rewind(self):
+        with self.lock:
+            self.positions.clear()
+
+    @property
+    def requests(self):
+        return sum(len(responses) for responses in self.entries.values())
+
+    def request(self, session, method, url, **kwargs):
+        key = get_key(method, url, kwargs.get("params"))
+        if self.mode == "record":
+            kwargs["headers"] = {name: value for name, value in (kwargs.get("headers") or {}).items()
+                                 if name not in conditional_headers}
+            response = session.request(method, url, **kwargs)
+            self.record(key, response.status_code, response.headers, response.content)
+            return response
+
+        entry = self.replay(key)
+        if self.latency:
+            time.sleep(self.latency)
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response._content = decode_body(entry)
+        response.encoding = "utf-8"
+        response.url = url
+        return response
+
+class AsyncFixtureResponse:
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = CaseInsensitiveDict(headers)
+        self.body = body
+
+    async def read(self):
+        return self.body
+
+class AsyncFixtureRequest:
+    def __init__(self, fixtures, session, url, headers):
+        self.fixtures = fixtures
+        self.session = session
+        self.url = url
+        self.headers = headers or {}
+
+    async def __aenter__(self):
+        fixtures = self.fixtures
+        key = get_key("GET", self.url)
+        if fixtures.mode == "record":
+            request_headers = {name: value for name, value in self.headers.items() if name not in conditional_headers}
+            async with self.session.get(self.url, headers=request_headers) as resp:
+                body = await resp.read()
+                headers = {name: resp.headers[name] for name in kept_headers if name in resp.headers}
+                fixtures.record(key, resp.status, headers, body)
+                return AsyncFixtureResponse(resp.status, headers, body)
+
+        entry = fixtures.replay(key)
+        if fixtures.latency:
+            await asyncio.sleep(fixtures.latency)
+        return AsyncFixtureResponse(entry["status"], entry["headers"], decode_body(entry))
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+class AsyncFixtureSession:
+    def __init__(self, fixtures, session=None):
+        self.fixtures = fixtures
+        self.session = session
+
+    def get(self, url, headers=None):
+        return AsyncFixtureRequest(self.fixtures, self.session, url, headers)
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+
+@contextmanager
+def use_fixtures(path, mode="replay", latency=0.0):
+    fixtures = HttpFixtures(path, mode, latency)
+    previous = httpSession.set_fixtures(fixtures)
+    # Cached responses would bypass the fixture: not recorded, or answered from SQLite on replay
+    cache_enabled = metadata_cache.enabled
+    metadata_cache.enabled = False
+    try:
+        yield fixtures
+    finally:
+        metadata_cache.enabled = cache_enabled
+        httpSession.set_fixtures(previous)
+        if mode == "record":
+            fixtures.save()
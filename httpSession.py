@@ -0,0 +1,77 @@
+import threading
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+
+pool_connections = 4
+pool_maxsize = 16
+default_timeout = 30
+
+_sessions = {}
+_lock = threading.Lock()
+_fixtures = None
+
+def configure(pool_size=None, timeout=None, http2=False):
+    global pool_maxsize, default_timeout
+
+    if pool_size is not None:
+        pool_maxsize = max(1, int(pool_size))
+    if timeout is not None:
+        default_timeout = timeout
+    enabled = enable_http2() if http2 else False
+
+    close_all()
+    return enabled
+
+# urllib3 2.x ships experimental HTTP/2 support when the h2 package is installed.
+# It is process-wide and negotiates h2 only, so it stays opt-in.
+def enable_http2():
+    try:
+        import urllib3.http2
+        urllib3.http2.inject_into_urllib3()
+        return True
+    except Exception:
+        return False
+
+def set_fixtures(fixtures):
+    global _fixtures
+
+    previous, _fixtures = _fixtures, fixtures
+    return previous
+
+def get_fixtures():
+    return _fixtures
+
+def get_session(url):
+    host = urlparse(url).netloc
+
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _sessions[host] = session
+
+    return session
+
+def request(method, url, **kwargs):
+    kwargs.setdefault('timeout', default_timeout)
+    if _fixtures is not None:
+        return _fixtures.request(get_session(url), method, url, **kwargs)
+    return get_session(url).request(method, url, **kwargs)
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
+
+def close_all():
+    with _lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+
+    for session in sessions:
+        session.close()
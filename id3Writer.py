@@ -0,0 +1,69 @@
+import io
+from datetime import datetime
+from mutagen.id3 import ID3, APIC, TIT2, TPE1, TALB, TDRC, TRCK, TSRC, COMM, TXXX
+
+def build_id3_tag(track, image_data=None):
+    tags = ID3()
+
+    tags.add(TIT2(encoding=3, text=track.title))
+    tags.add(TPE1(encoding=3, text=track.artists.split(", ")))
+    tags.add(TALB(encoding=3, text=track.album))
+    tags.add(COMM(encoding=3, lang='eng', desc='Source', text='github.com/afkarxyz/SpotiDownloader'))
+
+    if track.release_date:
+        try:
+            datetime.strptime(track.release_date, "%Y-%m-%d")
+            tags.add(TDRC(encoding=3, text=track.release_date))
+        except ValueError:
+            if track.release_date.isdigit():
+                tags.add(TDRC(encoding=3, text=track.release_date))
+
+    tags.add(TRCK(encoding=3, text=str(track.track_number)))
+    tags.add(TSRC(encoding=3, text=track.isrc))
+    tags.add(TXXX(encoding=3, desc='Spotify Track ID', text=track.id))
+
+    if image_data:
+        tags.add(APIC(
+            encoding=3,
+            mime='image/jpeg',
+            type=3,
+            desc='',
+            data=image_data
+        ))
+
+    buffer = io.BytesIO()
+    tags.save(buffer, v1=0)
+    return buffer.getvalue()
+
+def get_id3v2_size(header):
+    if len(header) < 10 or header[:3] != b"ID3":
+        return 0
+    size = 0
+    for byte in header[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if header[5] & 0x10 else 0
+    return 10 + size + footer
+
+class ID3v2Stripper:
+    def __init__(self, remaining=None):
+        self.header = b""
+        self.remaining = remaining
+
+    def feed(self, chunk):
+        if self.remaining is None:
+            self.header += chunk
+            if len(self.header) < 10:
+                return b""
+            chunk, self.header = self.header, b""
+            self.remaining = get_id3v2_size(chunk)
+
+        if self.remaining:
+            skipped = min(self.remaining, len(chunk))
+            self.remaining -= skipped
+            chunk = chunk[skipped:]
+
+        return chunk
+
+    def flush(self):
+        chunk, self.header = self.header, b""
+        return chunk
@@ -0,0 +1,339 @@
+import os
+import json
+import time
+import uuid
+import threading
+from dataclasses import dataclass, asdict, fields
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+from appData import get_data_dir
+from getMetadata import get_filtered_data, parse_uri
+from tracing import tracer, format_summary
+from playlistSync import get_pending_sync, commit_playlist_sync
+from downloadEngine import DownloadEngine, CancellationToken, PauseGate, TrackClaims, get_download_plan, get_job_outpath
+
+prefetch_workers = 2
+max_active_jobs = 2
+pending_statuses = ("queued", "fetching", "ready", "downloading")
+
+@dataclass
+class Job:
+    id: str
+    url: str
+    status: str = "queued"
+    name: str = ""
+    type: str = ""
+    total: int = 0
+    downloaded: int = 0
+    skipped: int = 0
+    failed: int = 0
+    error: str = ""
+    added_at: int = 0
+
+    def __post_init__(self):
+        self.tracks = None
+        self.context = None
+        self.pending_sync = None
+
+def fetch_job_metadata(url, sync=False, use_async=False):
+    url_info = parse_uri(url)
+    if use_async:
+        from getMetadataAsync import get_filtered_data as get_filtered_data_async
+        metadata = get_filtered_data_async(url, sync=sync)
+    else:
+        metadata = get_filtered_data(url, sync=sync)
+    if "error" in metadata:
+        raise Exception(metadata["error"])
+    return metadata, url_info
+
+class JobQueue:
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.jobs = None
+
+    def get_path(self):
+        return self.path or get_data_dir() / "job_queue.json"
+
+    def load(self):
+        if self.jobs is not None:
+            return self.jobs
+        try:
+            with open(self.get_path(), "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = []
+
+        names = {field.name for field in fields(Job)}
+        self.jobs = []
+        for entry in entries:
+            job = Job(**{key: value for key, value in entry.items() if key in names})
+            if job.status in pending_statuses:
+                job.status = "queued"
+            self.jobs.append(job)
+        return self.jobs
+
+    def save(self):
+        path = self.get_path()
+        temp_path = path.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump([asdict(job) for job in self.jobs], f, indent=2)
+        temp_path.replace(path)
+
+    def list(self):
+        with self.lock:
+            return list(self.load())
+
+    def add(self, urls):
+        added = []
+        with self.lock:
+            jobs = self.load()
+            pending_urls = {job.url for job in jobs if job.status in pending_statuses}
+            for url in urls:
+                if url in pending_urls:
+                    continue
+                pending_urls.add(url)
+                job = Job(id=uuid.uuid4().hex[:12], url=url, added_at=int(time.time()))
+                jobs.append(job)
+                added.append(job)
+            if added:
+                self.save()
+        return added
+
+    def remove(self, job_ids):
+        with self.lock:
+            jobs = self.load()
+            self.jobs = [job for job in jobs if job.id not in job_ids or job.status in ("fetching", "downloading")]
+            self.save()
+
+    def clear_finished(self):
+        with self.lock:
+            self.jobs = [job for job in self.load() if job.status in pending_statuses]
+            self.save()
+
+    def next_job(self, status):
+        with self.lock:
+            return next((job for job in self.load() if job.status == status), None)
+
+    def count(self, statuses=pending_statuses):
+        with self.lock:
+            return sum(1 for job in self.load() if job.status in statuses)
+
+    def update(self, job, **changes):
+        with self.lock:
+            for key, value in changes.items():
+                setattr(job, key, value)
+            self.save()
+
+class JobRunner:
+    def __init__(self, queue, token, output_root, max_workers=1, engine_options=None, sync=False, use_async=False,
+                 progress=None, finished=None, job_updated=None):
+        self.queue = queue
+        self.token = token
+        self.output_root = output_root
+        self.max_workers = max(1, int(max_workers))
+        self.engine_options = engine_options or {}
+        self.sync = sync
+        self.use_async = use_async
+        self.progress = progress or (lambda message, percentage: None)
+        self.finished = finished or (lambda success, message, failed, successful, skipped: None)
+        self.job_updated = job_updated or (lambda job: None)
+        self.cancel_token = CancellationToken()
+        self.pause_gate = PauseGate()
+        self.download_slots = threading.BoundedSemaphore(self.max_workers)
+        self.track_claims = TrackClaims()
+        self.condition = threading.Condition()
+        self.cancel_token.add_callback(self.wake)
+        self.fetching = 0
+        self.prefetches = []
+        self.engines = {}
+        self.threads = []
+        self.planned_tracks = 0
+        self.completed_tracks = 0
+        self.failed_tracks = []
+        self.successful_tracks = []
+        self.skipped_tracks = []
+        self.finished_jobs = 0
+        self.failed_jobs = 0
+
+    @property
+    def is_paused(self):
+        return self.pause_gate.paused
+
+    def wake(self):
+        with self.condition:
+            self.condition.notify_all()
+
+    def update_job(self, job, **changes):
+        self.queue.update(job, **changes)
+        self.job_updated(job)
+
+    def run(self):
+        tracer.start_run("queue")
+        try:
+            result = self.run_jobs()
+        finally:
+            summary = tracer.end_run()
+        
+        if summary and not self.cancel_token.cancelled:
+            self.progress(format_summary(summary), 0)
+        if result:
+            self.finish(*result)
+
+    def run_jobs(self):
+        executor = ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix="Metadata-prefetch")
+        try:
+            with self.condition:
+                while not self.cancel_token.cancelled:
+                    self.start_prefetch(executor)
+                    self.start_downloads()
+                    if not self.fetching and not self.engines:
+                        break
+                    self.condition.wait()
+        except Exception as e:
+            self.cancel_token.cancel()
+            return False, str(e)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            for job, future in self.prefetches:
+                if future.cancelled():
+                    self.update_job(job, status="queued")
+            for thread in self.threads:
+                thread.join()
+
+        if self.cancel_token.cancelled:
+            return None
+
+        message = f"Queue completed!\n\nJobs: {self.finished_jobs} finished"
+        if self.failed_jobs:
+            message += f", {self.failed_jobs} failed to fetch"
+        if self.failed_tracks:
+            message += f"\n\nFailed downloads: {len(self.failed_tracks)} tracks (saved for Retry Failed)"
+        if self.successful_tracks:
+            message += f"\n\nSuccessful downloads: {len(self.successful_tracks)} tracks"
+        if self.skipped_tracks:
+            message += f"\n\nSkipped (already exists): {len(self.skipped_tracks)} tracks"
+        return True, message
+
+    def finish(self, success, message):
+        self.finished(success, message, self.failed_tracks, self.successful_tracks, self.skipped_tracks)
+
+    def start_prefetch(self, executor):
+        while self.fetching < prefetch_workers:
+            job = self.queue.next_job("queued")
+            if not job:
+                return
+            self.fetching += 1
+            self.update_job(job, status="fetching", error="")
+            self.prefetches.append((job, executor.submit(self.prefetch, job)))
+
+    def prefetch(self, job):
+        try:
+            metadata, url_info = fetch_job_metadata(job.url, self.sync, self.use_async)
+            tracks, context = get_download_plan(metadata, url_info["type"])
+            if context is None:
+                raise Exception(f"Nothing to download for a Spotify {url_info['type']} URL")
+
+            job.tracks, job.context = tracks, context
+            job.pending_sync = get_pending_sync(metadata)
+            name = context["album_or_playlist_name"]
+            if tracks:
+                self.progress(f"Fetched metadata: {name} ({len(tracks)} tracks)", 0)
+                self.update_job(job, status="ready", type=url_info["type"], name=name, total=len(tracks))
+            else:
+                commit_playlist_sync(job.pending_sync, [])
+                self.progress(f"Nothing new to download: {name}", 0)
+                self.update_job(job, status="done", type=url_info["type"], name=name, total=0)
+        except Exception as e:
+            self.progress(f"Failed to fetch metadata: {job.url}\nError: {str(e)}", 0)
+            self.update_job(job, status="error", error=str(e))
+            with self.condition:
+                self.failed_jobs += 1
+        finally:
+            with self.condition:
+                self.fetching -= 1
+                self.condition.notify_all()
+
+    def start_downloads(self):
+        while len(self.engines) < max_active_jobs:
+            job = self.queue.next_job("ready")
+            if not job:
+                return
+
+            context = job.context
+            outpath = get_job_outpath(self.output_root, context)
+            os.makedirs(outpath, exist_ok=True)
+            engine = DownloadEngine(
+                job.tracks, outpath, self.token,
+                context["is_single_track"], context["is_album"], context["is_playlist"], context["album_or_playlist_name"],
+                max_workers=self.max_workers, library_root=self.output_root,
+                progress=self.on_progress, finished=partial(self.on_job_finished, job),
+                on_event=self.on_event, cancel_token=self.cancel_token, pause_gate=self.pause_gate,
+                download_slots=self.download_slots, track_claims=self.track_claims,
+                **self.engine_options
+            )
+            self.engines[job.id] = engine
+            self.planned_tracks += len(job.tracks)
+            self.update_job(job, status="downloading", downloaded=0, skipped=0, failed=0)
+            self.progress(f"Starting: {job.name} ({job.total} tracks)", 0)
+
+            thread = threading.Thread(target=self.run_job, args=(job, engine), name=f"job-{job.id}", daemon=True)
+            self.threads.append(thread)
+            thread.start()
+
+    def run_job(self, job, engine):
+        try:
+            engine.run()
+        finally:
+            if job.status == "downloading":
+                self.update_job(job, status="queued")
+            with self.condition:
+                self.engines.pop(job.id, None)
+                self.condition.notify_all()
+
+    def on_job_finished(self, job, success, message, failed, successful, skipped):
+        with self.condition:
+            self.failed_tracks.extend(failed)
+            self.successful_tracks.extend(successful)
+            self.skipped_tracks.extend(skipped)
+            self.finished_jobs += 1
+        commit_playlist_sync(job.pending_sync, [track.id for track in successful + skipped])
+        status = "done" if success else "error"
+        self.update_job(job, status=status, downloaded=len(successful), skipped=len(skipped), failed=len(failed),
+                        error="" if success else message)
+
+    def on_event(self, event, **fields):
+        if event == "track_finished":
+            with self.condition:
+                self.completed_tracks += 1
+
+    def on_progress(self, message, percentage):
+        if percentage > 0:
+            with self.condition:
+                percentage = max(1, min(100, int(self.completed_tracks / max(self.planned_tracks, 1) * 100)))
+        self.progress(message, percentage)
+
+    def set_token(self, token):
+        self.token = token
+        with self.condition:
+            engines = list(self.engines.values())
+        for engine in engines:
+            engine.token = token
+
+    def pause(self):
+        self.pause_gate.pause()
+        self.progress("Download process paused.", 0)
+
+    def resume(self):
+        self.pause_gate.resume()
+        self.progress("Download process resumed.", 0)
+
+    def stop(self):
+        self.cancel_token.cancel()
+        with self.condition:
+            engines = list(self.engines.values())
+        for engine in engines:
+            engine.stop()
+
+job_queue = JobQueue()
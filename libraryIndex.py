@@ -0,0 +1,197 @@
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from mutagen.mp3 import MP3
+from appData import get_data_dir
+
+min_file_size = 100000
+spotify_id_frame = "TXXX:Spotify Track ID"
+
+@dataclass
+class LibraryEntry:
+    path: str
+    size: int
+    mtime: int
+    duration: float = 0.0
+    spotify_id: str = None
+    isrc: str = None
+
+    @property
+    def valid(self):
+        return self.size >= min_file_size and self.duration > 0
+
+def normalize_path(path):
+    return os.path.normcase(os.path.abspath(path))
+
+def probe_file(path, stat=None):
+    stat = stat or os.stat(path)
+    entry = LibraryEntry(normalize_path(path), stat.st_size, stat.st_mtime_ns)
+    if entry.size < min_file_size:
+        return entry
+
+    try:
+        audio = MP3(path)
+    except Exception:
+        return entry
+
+    entry.duration = audio.info.length
+    if audio.tags:
+        if spotify_id_frame in audio.tags:
+            entry.spotify_id = str(audio.tags[spotify_id_frame].text[0])
+        if "TSRC" in audio.tags:
+            entry.isrc = str(audio.tags["TSRC"].text[0])
+    return entry
+
+def walk_mp3_files(root):
+    pending = [root]
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif entry.name.lower().endswith(".mp3") and entry.is_file():
+                            yield entry.path, entry.stat()
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+class LibraryIndex:
+    def __init__(self, path=None):
+        self.path = path
+        self.connection = None
+        self.entries = {}
+        self.by_spotify_id = {}
+        self.by_isrc = {}
+        self.lock = threading.Lock()
+        self.stats = {"files": 0, "probed": 0, "removed": 0}
+
+    def connect(self):
+        if self.connection is None:
+            path = self.path or get_data_dir() / "library_index.db"
+            self.connection = sqlite3.connect(str(path), check_same_thread=False)
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime INTEGER NOT NULL,
+                    duration REAL NOT NULL,
+                    spotify_id TEXT,
+                    isrc TEXT
+                )
+            """)
+            self.connection.commit()
+        return self.connection
+
+    def load_rows(self, root):
+        prefix = root.rstrip(os.sep) + os.sep
+        rows = self.connect().execute(
+            "SELECT path, size, mtime, duration, spotify_id, isrc FROM files WHERE path >= ? AND path < ?",
+            (prefix, prefix + "\uffff")
+        ).fetchall()
+        return {row[0]: LibraryEntry(*row) for row in rows}
+
+    def refresh(self, root):
+        root = normalize_path(root)
+        with self.lock:
+            known = self.load_rows(root)
+
+        entries = {}
+        changed = []
+        for path, stat in walk_mp3_files(root):
+            path = normalize_path(path)
+            entry = known.get(path)
+            if entry is None or entry.size != stat.st_size or entry.mtime != stat.st_mtime_ns:
+                entry = probe_file(path, stat)
+                changed.append(entry)
+            entries[path] = entry
+
+        removed = [path for path in known if path not in entries]
+        with self.lock:
+            connection = self.connect()
+            connection.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                [(e.path, e.size, e.mtime, e.duration, e.spotify_id, e.isrc) for e in changed]
+            )
+            connection.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in removed])
+            connection.commit()
+
+            for path in removed:
+                self.entries.pop(path, None)
+            self.entries.update(entries)
+            self.rebuild_content_index()
+            self.stats = {"files": len(entries), "probed": len(changed), "removed": len(removed)}
+        return self.stats
+
+    def rebuild_content_index(self):
+        self.by_spotify_id = {}
+        self.by_isrc = {}
+        for entry in self.entries.values():
+            self.index_content(entry)
+
+    def index_content(self, entry):
+        if entry.spotify_id:
+            self.by_spotify_id.setdefault(entry.spotify_id, set()).add(entry.path)
+        if entry.isrc:
+            self.by_isrc.setdefault(entry.isrc, set()).add(entry.path)
+
+    def unindex_content(self, entry):
+        if entry.spotify_id:
+            self.by_spotify_id.get(entry.spotify_id, set()).discard(entry.path)
+        if entry.isrc:
+            self.by_isrc.get(entry.isrc, set()).discard(entry.path)
+
+    def find_track(self, spotify_id, isrc=None, root=None):
+        prefix = normalize_path(root).rstrip(os.sep) + os.sep if root else ""
+        with self.lock:
+            for key, index in ((spotify_id, self.by_spotify_id), (isrc, self.by_isrc)):
+                for path in sorted(index.get(key, ())) if key else ():
+                    entry = self.entries.get(path)
+                    if entry and entry.valid and path.startswith(prefix):
+                        return entry
+        return None
+
+    def lookup(self, path):
+        with self.lock:
+            return self.entries.get(normalize_path(path))
+
+    def is_valid(self, path):
+        entry = self.lookup(path)
+        return entry is not None and entry.valid
+
+    def store(self, path, entry):
+        stat = os.stat(path)
+        entry = LibraryEntry(normalize_path(path), stat.st_size, stat.st_mtime_ns,
+                             entry.duration, entry.spotify_id, entry.isrc)
+        with self.lock:
+            self.connect().execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                (entry.path, entry.size, entry.mtime, entry.duration, entry.spotify_id, entry.isrc)
+            )
+            self.connection.commit()
+            if entry.path in self.entries:
+                self.unindex_content(self.entries[entry.path])
+            self.entries[entry.path] = entry
+            self.index_content(entry)
+        return entry
+
+    def remove(self, path):
+        path = normalize_path(path)
+        with self.lock:
+            entry = self.entries.pop(path, None)
+            if entry:
+                self.unindex_content(entry)
+            self.connect().execute("DELETE FROM files WHERE path = ?", (path,))
+            self.connection.commit()
+
+    def format_stats(self, elapsed=None):
+        text = (f"Library index: {self.stats['files']} files, {self.stats['probed']} probed, "
+                f"{self.stats['removed']} removed")
+        if elapsed is not None:
+            text += f" in {elapsed:.1f}s"
+        return text
+
+library_index = LibraryIndex()
@@ -0,0 +1,165 @@
+import json
+import time
+import sqlite3
+import sys
+import threading
+from urllib.parse import urlparse
+from appData import get_data_dir
+
+resource_ttls = {
+    "playlists": 10 * 60,
+    "albums": 7 * 24 * 3600,
+    "tracks": 7 * 24 * 3600,
+    "artists": 24 * 3600,
+}
+default_ttl = 3600
+max_cache_bytes = 64 * 1024 * 1024
+
+def get_resource_type(url):
+    parts = [part for part in urlparse(url).path.split("/") if part]
+    if len(parts) >= 2 and parts[0] == "v1":
+        return parts[1]
+    return "other"
+
+class CacheEntry:
+    def __init__(self, data, etag, last_modified, fetched_at, ttl):
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+        self.ttl = ttl
+
+    @property
+    def is_fresh(self):
+        return time.time() - self.fetched_at < self.ttl
+
+    def validators(self):
+        validators = {}
+        if self.etag:
+            validators["If-None-Match"] = self.etag
+        if self.last_modified:
+            validators["If-Modified-Since"] = self.last_modified
+        return validators
+
+class MetadataCache:
+    def __init__(self, path=None, max_bytes=max_cache_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self.connection = None
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "stored": 0, "evicted": 0}
+
+    def connect(self):
+        if self.connection is None:
+            path = self.path or get_data_dir() / "metadata_cache.db"
+            self.connection = sqlite3.connect(str(path), check_same_thread=False)
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    url TEXT PRIMARY KEY,
+                    resource_type TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    size INTEGER NOT NULL
+                )
+            """)
+            self.connection.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access)")
+            self.connection.commit()
+        return self.connection
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def lookup(self, url):
+        if not self.enabled:
+            return None
+
+        try:
+            with self.lock:
+                row = self.connect().execute(
+                    "SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?", (url,)
+                ).fetchone()
+                if row:
+                    self.connection.execute("UPDATE responses SET last_access = ? WHERE url = ?", (time.time(), url))
+                    self.connection.commit()
+        except sqlite3.Error as e:
+            print(f"Metadata cache disabled: {e}", file=sys.stderr)
+            self.enabled = False
+            return None
+
+        if not row:
+            return None
+
+        ttl = resource_ttls.get(get_resource_type(url), default_ttl)
+        return CacheEntry(json.loads(row[0]), row[1], row[2], row[3], ttl)
+
+    def store(self, url, data, etag=None, last_modified=None):
+        if not self.enabled:
+            return
+
+        body = json.dumps(data, separators=(",", ":"))
+        now = time.time()
+        try:
+            with self.lock:
+                self.connect().execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (url, get_resource_type(url), body, etag, last_modified, now, now, len(body))
+                )
+                self.stats["stored"] += 1
+                self.evict()
+                self.connection.commit()
+        except sqlite3.Error as e:
+            print(f"Metadata cache disabled: {e}", file=sys.stderr)
+            self.enabled = False
+
+    def touch(self, url):
+        if not self.enabled:
+            return
+
+        now = time.time()
+        try:
+            with self.lock:
+                self.connect().execute(
+                    "UPDATE responses SET fetched_at = ?, last_access = ? WHERE url = ?", (now, now, url)
+                )
+                self.connection.commit()
+        except sqlite3.Error:
+            pass
+
+    def evict(self):
+        total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self.connection.execute("SELECT url, size FROM responses ORDER BY last_access").fetchall()
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            self.connection.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+            self.stats["evicted"] += 1
+
+    def clear(self):
+        with self.lock:
+            self.connect().execute("DELETE FROM responses")
+            self.connection.commit()
+
+    def reset_stats(self):
+        with self.lock:
+            for key in self.stats:
+                self.stats[key] = 0
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats)
+
+    def format_stats(self):
+        stats = self.get_stats()
+        return (f"Metadata cache: {stats['hits']} hits, {stats['misses']} misses, "
+                f"{stats['revalidated']} revalidated (304)")
+
+metadata_cache = MetadataCache()
@@ -0,0 +1,63 @@
+import os
+import re
+import json
+
+def get_sidecar_path(temp_filepath):
+    return temp_filepath + ".json"
+
+def load_partial(temp_filepath):
+    path = get_sidecar_path(temp_filepath)
+    if not os.path.exists(path) or not os.path.exists(temp_filepath):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not state.get("link") or not state.get("received"):
+        return None
+    if os.path.getsize(temp_filepath) < state["tag_length"] + state["written"]:
+        return None
+    return state
+
+def save_partial(temp_filepath, state):
+    path = get_sidecar_path(temp_filepath)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(temp_path, path)
+
+def discard_partial(temp_filepath, keep_data=False):
+    paths = [get_sidecar_path(temp_filepath)] if keep_data else [temp_filepath, get_sidecar_path(temp_filepath)]
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def new_partial_state(link, response):
+    return {
+        "link": link,
+        "length": int(response.headers.get('Content-Length', 0) or 0),
+        "etag": response.headers.get('ETag'),
+        "last_modified": response.headers.get('Last-Modified'),
+        "tag_length": 0,
+        "received": 0,
+        "written": 0,
+        "strip_remaining": None
+    }
+
+def get_range_headers(state):
+    range_headers = {'Range': f"bytes={state['received']}-"}
+    etag = state.get("etag")
+    validator = etag if etag and not etag.startswith("W/") else state.get("last_modified")
+    if validator:
+        range_headers['If-Range'] = validator
+    return range_headers
+
+def is_matching_range(response, state):
+    if response.status_code != 206:
+        return False
+    match = re.match(r"bytes (\d+)-", response.headers.get('Content-Range', ''))
+    return bool(match) and int(match.group(1)) == state["received"]
@@ -0,0 +1,79 @@
+import json
+import time
+from appData import get_data_dir
+
+def get_state_path(playlist_id):
+    sync_dir = get_data_dir() / "playlist_sync"
+    sync_dir.mkdir(exist_ok=True)
+    return sync_dir / f"{playlist_id}.json"
+
+def load_sync_state(playlist_id):
+    path = get_state_path(playlist_id)
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_sync_state(playlist_id, snapshot_id, track_ids):
+    path = get_state_path(playlist_id)
+    temp_path = path.with_suffix(".tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"snapshot_id": snapshot_id, "track_ids": track_ids, "synced_at": int(time.time())}, f)
+    temp_path.replace(path)
+
+def is_snapshot_unchanged(sync_state, playlist_data):
+    snapshot_id = playlist_data.get("snapshot_id")
+    return bool(sync_state and snapshot_id and sync_state.get("snapshot_id") == snapshot_id)
+
+def apply_playlist_sync(filtered_data, raw_data):
+    playlist_info = filtered_data["playlist_info"]
+    sync_info = raw_data.get("_sync", {})
+
+    if sync_info.get("unchanged"):
+        playlist_info["sync"] = {"unchanged": True, "added": 0, "removed": 0}
+        filtered_data["track_list"] = []
+        return filtered_data
+
+    previous_state = sync_info.get("previous_state") or {}
+    previous_ids = set(previous_state.get("track_ids", []))
+    track_list = filtered_data["track_list"]
+    current_ids = [track["id"] for track in track_list if track.get("id")]
+
+    added_tracks = [track for track in track_list if track.get("id") and track["id"] not in previous_ids]
+    removed_count = len(previous_ids - set(current_ids))
+
+    playlist_info["sync"] = {
+        "unchanged": False,
+        "first_sync": not previous_state,
+        "added": len(added_tracks),
+        "removed": removed_count,
+        "pending": {
+            "playlist_id": playlist_info["id"],
+            "snapshot_id": raw_data.get("snapshot_id", ""),
+            "previous_snapshot_id": previous_state.get("snapshot_id", ""),
+            "kept_ids": [track_id for track_id in current_ids if track_id in previous_ids],
+            "added_ids": list(dict.fromkeys(track["id"] for track in added_tracks))
+        }
+    }
+    filtered_data["track_list"] = added_tracks
+    return filtered_data
+
+def get_pending_sync(metadata):
+    return (metadata.get("playlist_info") or {}).get("sync", {}).get("pending")
+
+def commit_playlist_sync(pending, completed_ids):
+    if not pending:
+        return
+
+    completed_ids = set(completed_ids)
+    done = [track_id for track_id in pending["added_ids"] if track_id in completed_ids]
+    if not done and pending["added_ids"]:
+        return
+    pending["kept_ids"] = pending["kept_ids"] + done
+    pending["added_ids"] = [track_id for track_id in pending["added_ids"] if track_id not in completed_ids]
+
+    snapshot_id = pending["previous_snapshot_id"] if pending["added_ids"] else pending["snapshot_id"]
+    save_sync_state(pending["playlist_id"], snapshot_id, pending["kept_ids"])
@@ -0,0 +1,86 @@
+import time
+import threading
+
+initial_rate = 20.0
+min_rate = 0.5
+max_rate = 50.0
+burst_size = 20
+rate_increase = 1.5
+successes_per_increase = 5
+throttle_backoff = 0.5
+default_retry_after = 5
+max_throttle_retries = 5
+
+def parse_retry_after(value):
+    try:
+        return max(0, int(value)) + 1
+    except (TypeError, ValueError):
+        return default_retry_after + 1
+
+class TokenBucket:
+    def __init__(self, rate=initial_rate, capacity=burst_size):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.successes = 0
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "waits": 0, "wait_time": 0.0, "throttled": 0}
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        with self.lock:
+            now = time.monotonic()
+            self.refill(now)
+            self.tokens -= 1
+            delay = max(0.0, self.blocked_until - now, -self.tokens / self.rate)
+            self.stats["requests"] += 1
+            if delay > 0:
+                self.stats["waits"] += 1
+                self.stats["wait_time"] += delay
+            return delay
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def on_success(self):
+        with self.lock:
+            self.successes += 1
+            if self.successes >= successes_per_increase:
+                self.successes = 0
+                self.rate = min(max_rate, self.rate * rate_increase)
+
+    def on_throttle(self, retry_after):
+        with self.lock:
+            now = time.monotonic()
+            self.refill(now)
+            self.successes = 0
+            if now >= self.blocked_until:
+                self.rate = max(min_rate, self.rate * throttle_backoff)
+            self.tokens = min(self.tokens, 0.0)
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+            self.stats["throttled"] += 1
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {"requests": 0, "waits": 0, "wait_time": 0.0, "throttled": 0}
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["rate"] = self.rate
+            return stats
+
+    def format_stats(self):
+        stats = self.get_stats()
+        return (f"Rate limiter: {stats['requests']} requests, {stats['waits']} waits "
+                f"({stats['wait_time']:.1f}s), {stats['throttled']} throttled (429), "
+                f"now {stats['rate']:.1f} req/s")
+
+rate_limiter = TokenBucket()
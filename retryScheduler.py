@@ -0,0 +1,149 @@
+import re
+import json
+import time
+import heapq
+import random
+import sys
+import threading
+from appData import get_data_dir
+
+retry_limits = {
+    "timeout": 4,
+    "network": 4,
+    "server": 4,
+    "rate_limit": 6,
+    "corrupted": 2,
+    "api": 2,
+}
+backoff_base = 2.0
+backoff_cap = 60.0
+rate_limit_backoff_base = 10.0
+
+def classify_error(message):
+    if message == "Download stopped by user":
+        return "stopped"
+    if message.startswith("Request timed out"):
+        return "timeout"
+    if message.startswith("Connection error"):
+        return "network"
+    if message == "Downloaded file appears to be corrupted":
+        return "corrupted"
+
+    match = re.search(r"[Ss]tatus code: (\d{3})", message)
+    if match:
+        status = int(match.group(1))
+        if status == 429:
+            return "rate_limit"
+        if status >= 500:
+            return "server"
+        return "client"
+
+    if message.startswith("API request failed:"):
+        return "api"
+    return "other"
+
+def is_retryable(category):
+    return retry_limits.get(category, 0) > 0
+
+def backoff_delay(attempt, category=None):
+    base = rate_limit_backoff_base if category == "rate_limit" else backoff_base
+    return random.uniform(base / 2, min(backoff_cap, base * 2 ** attempt))
+
+class RetryScheduler:
+    def __init__(self):
+        self.queue = []
+        self.sequence = 0
+        self.condition = threading.Condition()
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, name="retry-scheduler", daemon=True)
+        self.thread.start()
+
+    def schedule(self, delay, item, callback):
+        with self.condition:
+            self.sequence += 1
+            heapq.heappush(self.queue, (time.monotonic() + delay, self.sequence, item, callback))
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.closed and (not self.queue or self.queue[0][0] > time.monotonic()):
+                    timeout = self.queue[0][0] - time.monotonic() if self.queue else None
+                    self.condition.wait(timeout)
+                if self.closed:
+                    return
+                _, _, item, callback = heapq.heappop(self.queue)
+            try:
+                callback(item)
+            except Exception as e:
+                print(f"Error rescheduling retry: {e}", file=sys.stderr)
+
+    def cancel_all(self):
+        with self.condition:
+            items = [entry[2] for entry in sorted(self.queue)]
+            self.queue = []
+            return items
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+
+class DeadLetterQueue:
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def get_path(self):
+        return self.path or get_data_dir() / "dead_letters.json"
+
+    def load(self):
+        try:
+            with open(self.get_path(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self, entries):
+        path = self.get_path()
+        temp_path = path.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, indent=2)
+        temp_path.replace(path)
+
+    def add(self, track, context, error, category, attempts):
+        with self.lock:
+            entries = self.load()
+            entries[track["id"]] = {
+                "track": track,
+                "context": context,
+                "error": error,
+                "category": category,
+                "attempts": attempts,
+                "failed_at": int(time.time())
+            }
+            self.save(entries)
+
+    def discard(self, track_ids):
+        with self.lock:
+            entries = self.load()
+            removed = [track_id for track_id in track_ids if entries.pop(track_id, None)]
+            if removed:
+                self.save(entries)
+            return removed
+
+    def count(self):
+        with self.lock:
+            return len(self.load())
+
+    def groups(self):
+        with self.lock:
+            entries = self.load()
+
+        groups = {}
+        for entry in entries.values():
+            key = json.dumps(entry["context"], sort_keys=True)
+            groups.setdefault(key, (entry["context"], []))[1].append(entry["track"])
+        return list(groups.values())
+
+dead_letter_queue = DeadLetterQueue()
@@ -0,0 +1,143 @@
+import json
+import math
+import time
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+from appData import get_data_dir
+
+max_trace_files = 20
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+def format_summary(summary):
+    lines = [f"Trace: {summary['spans']} spans in {summary['elapsed']:.1f}s -> {summary['path']}",
+             f"{'Stage':<16}{'Count':>7}{'p50':>10}{'p95':>10}{'Max':>10}{'MB':>9}"]
+    for name, stage in summary["stages"].items():
+        lines.append(f"{name:<16}{stage['count']:>7}{stage['p50_ms']:>8.1f}ms{stage['p95_ms']:>8.1f}ms"
+                     f"{stage['max_ms']:>8.1f}ms{stage['bytes'] / 1048576:>9.2f}")
+    if summary["errors"]:
+        lines.append(f"Errors: {summary['errors']}")
+    return "\n".join(lines)
+
+class Tracer:
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.depth = 0
+        self.file = None
+        self.path = None
+        self.started_at = 0.0
+        self.durations = {}
+        self.bytes = {}
+        self.errors = 0
+
+    def get_directory(self):
+        directory = self.directory or get_data_dir() / "traces"
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory
+
+    def prune(self, directory):
+        traces = sorted(directory.glob("*.jsonl"))
+        for path in traces[:-max_trace_files]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def start_run(self, label):
+        with self.lock:
+            self.depth += 1
+            if self.depth > 1:
+                return
+            directory = self.get_directory()
+            self.path = directory / f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')[:-3]}-{label}.jsonl"
+            self.file = open(self.path, "w", encoding="utf-8")
+            self.started_at = time.perf_counter()
+            self.durations = {}
+            self.bytes = {}
+            self.errors = 0
+            self.write({"type": "run", "label": label, "time": round(time.time(), 3)})
+        self.prune(directory)
+
+    def end_run(self):
+        with self.lock:
+            self.depth = max(0, self.depth - 1)
+            if self.depth or not self.file:
+                return None
+            summary = self.summarize()
+            self.write({"type": "summary", **summary})
+            self.file.close()
+            self.file = None
+            return summary
+
+    def summarize(self):
+        stages = {}
+        for name, durations in self.durations.items():
+            durations = sorted(durations)
+            stages[name] = {
+                "count": len(durations),
+                "p50_ms": percentile(durations, 0.5) * 1000,
+                "p95_ms": percentile(durations, 0.95) * 1000,
+                "max_ms": durations[-1] * 1000,
+                "bytes": self.bytes.get(name, 0)
+            }
+        return {
+            "path": str(self.path),
+            "elapsed": time.perf_counter() - self.started_at,
+            "spans": sum(stage["count"] for stage in stages.values()),
+            "errors": self.errors,
+            "stages": stages
+        }
+
+    def write(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    @property
+    def active(self):
+        return self.file is not None
+
+    @contextmanager
+    def span(self, name, **attrs):
+        if not self.active:
+            yield attrs
+            return
+
+        started_at = time.perf_counter()
+        try:
+            yield attrs
+        except Exception as e:
+            attrs["error"] = str(e)
+            raise
+        finally:
+            duration = time.perf_counter() - started_at
+            self.record(name, started_at, duration, attrs)
+
+    def record(self, name, started_at, duration, attrs):
+        with self.lock:
+            if not self.file:
+                return
+            self.durations.setdefault(name, []).append(duration)
+            if attrs.get("bytes"):
+                self.bytes[name] = self.bytes.get(name, 0) + attrs["bytes"]
+            if attrs.get("error"):
+                self.errors += 1
+            self.write({
+                "type": "span",
+                "name": name,
+                "start": round(started_at - self.started_at, 6),
+                "duration_ms": round(duration * 1000, 3),
+                "thread": threading.current_thread().name,
+                **attrs
+            })
+
+    def event(self, name, **fields):
+        with self.lock:
+            if not self.file:
+                return
+            self.write({"type": "event", "name": name, "start": round(time.perf_counter() - self.started_at, 6), **fields})
+
+tracer = Tracer()
@@ -0,0 +1,173 @@
+from datetime import datetime
+from functools import lru_cache
+
+from PyQt6.QtCore import Qt, QAbstractListModel, QSortFilterProxyModel, QModelIndex
+
+default_track_list_format = "track_artist_date_duration"
+# (artist first, show date, show duration)
+track_list_formats = {
+    "track_artist_date_duration": (False, True, True),
+    "artist_track_date_duration": (True, True, True),
+    "track_artist_date": (False, True, False),
+    "artist_track_date": (True, True, False),
+    "track_artist_duration": (False, False, True),
+    "artist_track_duration": (True, False, True),
+    "track_artist": (False, False, False),
+    "artist_track": (True, False, False),
+}
+max_row_removals = 64
+
+def format_duration(ms):
+    minutes = ms // 60000
+    seconds = (ms % 60000) // 1000
+    return f"{minutes}:{seconds:02d}"
+
+@lru_cache(maxsize=4096)
+def format_track_date(release_date, date_format):
+    if not release_date:
+        return ""
+
+    try:
+        if len(release_date) == 4:
+            return datetime.strptime(release_date, "%Y").strftime('%Y')
+        elif len(release_date) == 7:
+            date_obj = datetime.strptime(release_date, "%Y-%m")
+            if date_format == "dd_mm_yyyy":
+                return date_obj.strftime('%m-%Y')
+            elif date_format == "yyyy_mm_dd":
+                return date_obj.strftime('%Y-%m')
+            else:
+                return date_obj.strftime('%Y')
+        else:
+            date_obj = datetime.strptime(release_date, "%Y-%m-%d")
+            if date_format == "dd_mm_yyyy":
+                return date_obj.strftime('%d-%m-%Y')
+            elif date_format == "yyyy_mm_dd":
+                return date_obj.strftime('%Y-%m-%d')
+            else:
+                return date_obj.strftime('%Y')
+    except ValueError:
+        return release_date
+
+def format_track_text(track, track_list_format, date_format):
+    artist_first, show_date, show_duration = track_list_formats.get(
+        track_list_format, track_list_formats[default_track_list_format])
+
+    display_parts = [f"{track.artists} - {track.title}" if artist_first else f"{track.title} - {track.artists}"]
+    if show_date:
+        formatted_date = format_track_date(track.release_date, date_format)
+        if formatted_date:
+            display_parts.append(formatted_date)
+    if show_duration:
+        display_parts.append(format_duration(track.duration_ms))
+    return " • ".join(display_parts)
+
+def get_row_ranges(rows):
+    ranges = []
+    for row in sorted(rows):
+        if ranges and ranges[-1][1] == row - 1:
+            ranges[-1][1] = row
+        else:
+            ranges.append([row, row])
+    return ranges
+
+class TrackListModel(QAbstractListModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tracks = []
+        self.track_list_format = default_track_list_format
+        self.date_format = "dd_mm_yyyy"
+        self.display_cache = {}
+        self.search_keys = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.tracks)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.tracks):
+            return None
+
+        track = self.tracks[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.display_text(track)
+        if role == Qt.ItemDataRole.UserRole:
+            return track
+        return None
+
+    def display_text(self, track):
+        cache = self.display_cache.setdefault((self.track_list_format, self.date_format), {})
+        text = cache.get(id(track))
+        if text is None:
+            text = cache[id(track)] = format_track_text(track, self.track_list_format, self.date_format)
+        return text
+
+    def search_key(self, row):
+        track = self.tracks[row]
+        key = self.search_keys.get(id(track))
+        if key is None:
+            key = self.search_keys[id(track)] = "\n".join((track.title, track.artists, track.album)).lower()
+        return key
+
+    def set_tracks(self, tracks):
+        self.beginResetModel()
+        self.tracks = list(tracks)
+        self.display_cache.clear()
+        self.search_keys.clear()
+        self.endResetModel()
+
+    def set_format(self, track_list_format, date_format):
+        if (track_list_format, date_format) == (self.track_list_format, self.date_format):
+            return
+
+        self.track_list_format = track_list_format
+        self.date_format = date_format
+        if self.tracks:
+            self.dataChanged.emit(self.index(0), self.index(len(self.tracks) - 1), [Qt.ItemDataRole.DisplayRole])
+
+    def remove_tracks(self, tracks):
+        track_ids = {id(track) for track in tracks}
+        rows = [row for row, track in enumerate(self.tracks) if id(track) in track_ids]
+        if not rows:
+            return
+
+        ranges = get_row_ranges(rows)
+        if len(ranges) > max_row_removals:
+            self.beginResetModel()
+            self.tracks = [track for track in self.tracks if id(track) not in track_ids]
+            self.endResetModel()
+        else:
+            for first, last in reversed(ranges):
+                self.beginRemoveRows(QModelIndex(), first, last)
+                del self.tracks[first:last + 1]
+                self.endRemoveRows()
+
+        for cache in (*self.display_cache.values(), self.search_keys):
+            for track_id in track_ids:
+                cache.pop(track_id, None)
+
+class TrackFilterProxyModel(QSortFilterProxyModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.search_text = ""
+
+    def set_search_text(self, text):
+        text = text.lower().strip()
+        if text == self.search_text:
+            return
+        self.search_text = text
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        return not self.search_text or self.search_text in self.sourceModel().search_key(source_row)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        value = super().data(index, role)
+        if role == Qt.ItemDataRole.DisplayRole and value is not None:
+            return f"{index.row() + 1}. {value}"
+        return value
+
+    def get_tracks(self, rows=None):
+        if rows is None:
+            rows = range(self.rowCount())
+        tracks = self.sourceModel().tracks
+        return [tracks[self.mapToSource(self.index(row, 0)).row()] for row in rows]